@@ -1,4 +1,5 @@
 import os
+import re
 import json
 from openai import OpenAI
 
@@ -61,42 +62,159 @@ Respond with JSON:
         return fallback_classify(query)
 
 
-def fallback_classify(query: str) -> dict:
+# Keyword categories for local classification, in priority order. Each maps
+# to the sources it suggests. Add categories or keywords here; the matcher
+# is compiled once, so its cost does not grow with the number of lists.
+KEYWORD_CATEGORIES = {
+    "weather": {
+        "sources": ["weather"],
+        "keywords": ["weather", "temperature", "forecast", "rain", "snow", "sunny", "cloudy", "climate"],
+    },
+    "science": {
+        "sources": ["arxiv"],
+        "keywords": ["research", "study", "paper", "scientific", "experiment", "theory",
+                     "physics", "chemistry", "biology", "math"],
+    },
+    "medical": {
+        "sources": ["pubmed"],
+        "keywords": ["health", "medical", "disease", "treatment", "medicine", "doctor",
+                     "hospital", "symptom", "drug", "therapy"],
+    },
+    "book": {
+        "sources": ["books"],
+        "keywords": ["book", "author", "novel", "literature", "read", "publish", "isbn"],
+    },
+    "location": {
+        "sources": ["geocoding"],
+        "keywords": ["where is", "location", "address", "map", "coordinates", "find place"],
+    },
+    "air": {
+        "sources": ["air_quality"],
+        "keywords": ["air quality", "pollution", "aqi", "smog", "pm2.5"],
+    },
+    "news": {
+        "sources": ["news"],
+        "keywords": ["news", "latest", "breaking", "announced", "election", "headlines"],
+    },
+    "code": {
+        "sources": ["github", "stackoverflow"],
+        "keywords": ["github", "repo", "library", "framework", "open source", "sdk", "api",
+                     "package", "python", "javascript", "java", "rust", "golang", "sql"],
+    },
+    "code_problem": {
+        "sources": ["stackoverflow"],
+        "keywords": ["error", "exception", "how to", "how do i", "bug", "compile", "syntax", "function"],
+    },
+    "definition": {
+        "sources": ["dictionary"],
+        "keywords": ["define", "definition", "meaning", "synonym", "pronounce", "spell"],
+    },
+    "country": {
+        "sources": ["country"],
+        "keywords": ["country", "capital", "population", "currency", "nation", "flag"],
+    },
+    "quotes": {
+        "sources": ["quotes"],
+        "keywords": ["quote", "saying", "said", "inspiration"],
+    },
+    "entity": {
+        "sources": ["wikidata"],
+        "keywords": ["who is", "who was", "born", "founded", "invented"],
+    },
+}
+
+
+def _trie_pattern(keywords) -> str:
+    """
+    Build a regex alternation factored by common prefix, so each position
+    is checked against a handful of branches rather than every keyword.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def render(node) -> str:
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # A keyword ending here is optional in the longer branches, which
+        # keeps the match greedy: the longest keyword wins.
+        return f"(?:{body})?" if "" in node else body
+
+    return render(trie)
+
+
+class KeywordMatcher:
+    """
+    Finds every keyword of every category in one regex pass.
+    Keywords match at the start of a word, so "books" and "rainy" count
+    but "brain" and "capital" do not hit "rain" and "api".
+    """
+
+    def __init__(self, categories: dict):
+        keyword_categories = {}
+        for category, spec in categories.items():
+            for keyword in spec["keywords"]:
+                keyword_categories.setdefault(keyword.lower(), []).append(category)
+        keywords = sorted(keyword_categories, key=len, reverse=True)
+        # At any position the regex reports only the longest keyword, so
+        # credit every shorter keyword that is a prefix of it as well.
+        self._hits = {
+            keyword: [(other, category)
+                      for other in keywords if keyword.startswith(other)
+                      for category in keyword_categories[other]]
+            for keyword in keywords
+        }
+        self._pattern = re.compile(rf"\b(?=({_trie_pattern(keywords)}))")
+
+    def match(self, text: str) -> dict:
+        """
+        Return {category: [(position, keyword), ...]} for every hit in text.
+        """
+        matches = {}
+        for m in self._pattern.finditer(text.lower()):
+            for keyword, category in self._hits[m.group(1)]:
+                matches.setdefault(category, []).append((m.start(), keyword))
+        return matches
+
+    def match_batch(self, texts) -> list:
+        return [self.match(text) for text in texts]
+
+
+KEYWORD_MATCHER = KeywordMatcher(KEYWORD_CATEGORIES)
+_CATEGORY_PRIORITY = {category: i for i, category in enumerate(KEYWORD_CATEGORIES)}
+
+_LOCATION_PATTERN = re.compile(r"(?<!\S)(?:in|at|for)\s+(\S.*)", re.IGNORECASE | re.DOTALL)
+
+
+def extract_location(query: str):
+    """
+    Return the text after the first standalone "in", "at" or "for", if any.
+    """
+    m = _LOCATION_PATTERN.search(query)
+    if m is None:
+        return None
+    return " ".join(m.group(1).split()).strip("?.,!")
+
+
+def fallback_classify(query: str, matches: dict = None) -> dict:
     """Fallback classification when AI is unavailable."""
-    query_lower = query.lower()
+    if matches is None:
+        matches = KEYWORD_MATCHER.match(query)
     sources = []
     location = None
     
-    weather_keywords = ["weather", "temperature", "forecast", "rain", "snow", "sunny", "cloudy", "climate"]
-    science_keywords = ["research", "study", "paper", "scientific", "experiment", "theory", "physics", "chemistry", "biology", "math"]
-    medical_keywords = ["health", "medical", "disease", "treatment", "medicine", "doctor", "hospital", "symptom", "drug", "therapy"]
-    book_keywords = ["book", "author", "novel", "literature", "read", "publish", "isbn"]
-    location_keywords = ["where is", "location", "address", "map", "coordinates", "find place"]
-    air_keywords = ["air quality", "pollution", "aqi", "smog", "pm2.5"]
-    
-    if any(kw in query_lower for kw in weather_keywords):
-        sources.append("weather")
-        words = query.split()
-        for i, word in enumerate(words):
-            if word.lower() in ["in", "at", "for"]:
-                if i + 1 < len(words):
-                    location = " ".join(words[i+1:]).strip("?.,!")
-                    break
-    
-    if any(kw in query_lower for kw in science_keywords):
-        sources.append("arxiv")
+    for category in sorted(matches, key=_CATEGORY_PRIORITY.__getitem__):
+        for name in KEYWORD_CATEGORIES[category]["sources"]:
+            if name not in sources:
+                sources.append(name)
     
-    if any(kw in query_lower for kw in medical_keywords):
-        sources.append("pubmed")
-    
-    if any(kw in query_lower for kw in book_keywords):
-        sources.append("books")
-    
-    if any(kw in query_lower for kw in location_keywords):
-        sources.append("geocoding")
-    
-    if any(kw in query_lower for kw in air_keywords):
-        sources.append("air_quality")
+    if "weather" in matches:
+        location = extract_location(query)
     
     sources.append("wikipedia")
     sources.append("duckduckgo")
@@ -108,6 +226,14 @@ def fallback_classify(query: str) -> dict:
     }
 
 
+def classify_batch(queries) -> list:
+    """
+    Classify many queries locally, e.g. when reprocessing query logs.
+    """
+    match = KEYWORD_MATCHER.match
+    return [fallback_classify(query, match(query)) for query in queries]
+
+
 def synthesize_response(query: str, search_results: dict) -> str:
     """
     Synthesize a natural language response from search results.
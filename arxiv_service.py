@@ -1,5 +1,12 @@
 import arxiv
 
+from client_pool import get_pool
+import rate_limiter
+
+# arxiv.Client keeps its own session and per-client request pacing, so
+# clients are pooled and reused rather than created per query.
+_client_pool = get_pool("arxiv", lambda _: arxiv.Client())
+
 
 def search_arxiv(query: str, max_results: int = 5) -> list:
     """
@@ -7,7 +14,6 @@ def search_arxiv(query: str, max_results: int = 5) -> list:
     Returns a list of paper summaries.
     """
     try:
-        client = arxiv.Client()
         search = arxiv.Search(
             query=query,
             max_results=max_results,
@@ -15,15 +21,18 @@ def search_arxiv(query: str, max_results: int = 5) -> list:
         )
         
         results = []
-        for paper in client.results(search):
-            results.append({
-                "title": paper.title,
-                "authors": [author.name for author in paper.authors[:3]],
-                "summary": paper.summary[:500] + "..." if len(paper.summary) > 500 else paper.summary,
-                "published": paper.published.strftime("%Y-%m-%d") if paper.published else "N/A",
-                "url": paper.entry_id,
-                "categories": paper.categories[:3] if paper.categories else []
-            })
+        # Pooled clients pace only themselves; the shared limiter paces the host.
+        rate_limiter.acquire("export.arxiv.org")
+        with _client_pool.client() as client:
+            for paper in client.results(search):
+                results.append({
+                    "title": paper.title,
+                    "authors": [author.name for author in paper.authors[:3]],
+                    "summary": paper.summary[:500] + "..." if len(paper.summary) > 500 else paper.summary,
+                    "published": paper.published.strftime("%Y-%m-%d") if paper.published else "N/A",
+                    "url": paper.entry_id,
+                    "categories": paper.categories[:3] if paper.categories else []
+                })
         
         return results
     except Exception as e:
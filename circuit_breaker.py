@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from collections import deque
+
+# A breaker opens after CONSECUTIVE_FAILURES failures in a row, or when at
+# least MIN_CALLS calls in the last WINDOW_SECONDS failed at FAILURE_RATE or
+# more. While open, calls are refused instantly. After the cool-down one
+# probe call is let through (half-open): success closes the breaker, failure
+# re-opens it with a doubled cool-down.
+WINDOW_SECONDS = float(os.environ.get("BREAKER_WINDOW_SECONDS", "120"))
+MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", "5"))
+FAILURE_RATE = float(os.environ.get("BREAKER_FAILURE_RATE", "0.5"))
+CONSECUTIVE_FAILURES = int(os.environ.get("BREAKER_CONSECUTIVE_FAILURES", "3"))
+OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", "30"))
+MAX_OPEN_SECONDS = float(os.environ.get("BREAKER_MAX_OPEN_SECONDS", "600"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Rolling error-rate and latency tracker for one source.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self._lock = threading.Lock()
+        self._calls = deque()
+        self._consecutive_failures = 0
+        self._open_seconds = OPEN_SECONDS
+        self._open_until = 0.0
+        self._probe_started = None
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        """
+        True if a call may go upstream now. In half-open state only a single
+        probe is let through at a time.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now >= self._open_until:
+                self.state = HALF_OPEN
+                self._probe_started = None
+            # A probe that never reported back must not wedge the breaker.
+            if self.state == HALF_OPEN and (
+                self._probe_started is None or now - self._probe_started > OPEN_SECONDS
+            ):
+                self._probe_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, latency: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._calls.append((now, ok, latency))
+            self._trim(now)
+            if ok:
+                self._consecutive_failures = 0
+                if self.state == HALF_OPEN:
+                    self.state = CLOSED
+                    self._open_seconds = OPEN_SECONDS
+                    self._calls.clear()
+                return
+            self._consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self._open(now, min(self._open_seconds * 2, MAX_OPEN_SECONDS))
+            elif self.state == CLOSED and self._should_open():
+                self._open(now, OPEN_SECONDS)
+
+    def _should_open(self) -> bool:
+        if self._consecutive_failures >= CONSECUTIVE_FAILURES:
+            return True
+        if len(self._calls) < MIN_CALLS:
+            return False
+        failures = sum(1 for _, ok, _ in self._calls if not ok)
+        return failures / len(self._calls) >= FAILURE_RATE
+
+    def _open(self, now: float, seconds: float) -> None:
+        self.state = OPEN
+        self.opened += 1
+        self._open_seconds = seconds
+        self._open_until = now + seconds
+        self._probe_started = None
+
+    def _trim(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > WINDOW_SECONDS:
+            self._calls.popleft()
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            calls = len(self._calls)
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+            latencies = sorted(latency for _, _, latency in self._calls)
+            return {
+                "state": self.state,
+                "calls": calls,
+                "error_rate": failures / calls if calls else 0.0,
+                "p50_latency": latencies[len(latencies) // 2] if latencies else None,
+                "max_latency": latencies[-1] if latencies else None,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in": max(0.0, self._open_until - now) if self.state == OPEN else 0.0,
+                "rejected": self.rejected,
+                "opened": self.opened,
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """
+    Return the process-wide breaker for a source, shared by all sessions.
+    """
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def breaker_snapshot() -> dict:
+    """
+    State of every breaker, for monitoring.
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+MAX_IDLE = int(os.environ.get("CLIENT_POOL_MAX_IDLE", "4"))
+MAX_USES = int(os.environ.get("CLIENT_POOL_MAX_USES", "500"))
+MAX_AGE = float(os.environ.get("CLIENT_POOL_MAX_AGE_SECONDS", "900"))
+
+
+class _Entry:
+    __slots__ = ("client", "created", "uses")
+
+    def __init__(self, client):
+        self.client = client
+        self.created = time.monotonic()
+        self.uses = 0
+
+
+class ClientPool:
+    """
+    Thread-safe pool of long-lived third-party clients, keyed (e.g. by
+    language). Clients are created lazily on checkout, returned to the pool
+    after use, and recycled when they raise, get too old or are used too
+    often, so a wedged session never outlives one failed call.
+    """
+
+    def __init__(self, name: str, factory, max_idle=MAX_IDLE,
+                 max_uses: int = MAX_USES, max_age: float = MAX_AGE):
+        self.name = name
+        self._factory = factory
+        self._max_idle = max_idle
+        self._max_uses = max_uses
+        self._max_age = max_age
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+
+    def _idle_limit(self, key) -> int:
+        if isinstance(self._max_idle, dict):
+            return self._max_idle.get(key, self._max_idle.get(None, MAX_IDLE))
+        return self._max_idle
+
+    def _healthy(self, entry: _Entry) -> bool:
+        return entry.uses < self._max_uses and time.monotonic() - entry.created < self._max_age
+
+    @contextmanager
+    def client(self, key=None):
+        """
+        Check out a client for `key`; it goes back to the pool afterwards,
+        or is discarded if the block raised.
+        """
+        entry = None
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle and entry is None:
+                candidate = idle.pop()
+                if self._healthy(candidate):
+                    entry = candidate
+                    self.reused += 1
+                else:
+                    self.recycled += 1
+        if entry is None:
+            entry = _Entry(self._factory(key))
+            with self._lock:
+                self.created += 1
+
+        entry.uses += 1
+        try:
+            yield entry.client
+        except BaseException:
+            with self._lock:
+                self.recycled += 1
+            raise
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if self._healthy(entry) and len(idle) < self._idle_limit(key):
+                idle.append(entry)
+            else:
+                self.recycled += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "idle": {str(key): len(entries) for key, entries in self._idle.items()},
+                "created": self.created,
+                "reused": self.reused,
+                "recycled": self.recycled,
+            }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str, factory, **options) -> ClientPool:
+    """
+    Return the process-wide pool registered under `name`, creating it on first use.
+    """
+    pool = _pools.get(name)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(name)
+            if pool is None:
+                pool = _pools[name] = ClientPool(name, factory, **options)
+    return pool
+
+
+def pool_stats() -> dict:
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
+
+
+def parse_sizes(spec: str) -> dict:
+    """
+    Parse per-key pool sizes such as "en=8,de=2"; "*" sets the default.
+    """
+    sizes = {}
+    for item in spec.split(","):
+        if "=" in item:
+            key, size = item.split("=", 1)
+            key = key.strip()
+            sizes[None if key == "*" else key] = int(size)
+    return sizes
@@ -1,14 +1,49 @@
-import requests
+from http_session import http_get
+from country_index import get_index
+
+
+def _format_country(country: dict) -> dict:
+    currencies = []
+    if country.get("currencies"):
+        for code, info in country.get("currencies", {}).items():
+            currencies.append(f"{info.get('name', '')} ({code})")
+    
+    languages = []
+    if country.get("languages"):
+        languages = list(country.get("languages", {}).values())
+    
+    return {
+        "name": country.get("name", {}).get("common", "Unknown"),
+        "official_name": country.get("name", {}).get("official", "Unknown"),
+        "capital": country.get("capital", ["N/A"])[0] if country.get("capital") else "N/A",
+        "region": country.get("region", "N/A"),
+        "subregion": country.get("subregion", "N/A"),
+        "population": country.get("population", "N/A"),
+        "area_km2": country.get("area", "N/A"),
+        "currencies": currencies,
+        "languages": languages[:5],
+        "flag_emoji": country.get("flag", ""),
+        "map_url": country.get("maps", {}).get("googleMaps", ""),
+        "source": "REST Countries API"
+    }
 
 
 def search_country(query: str) -> dict:
     """
     Search for country information using REST Countries API.
-    No API key required.
+    No API key required. Answered from the in-memory country index once a
+    snapshot is loaded; the API is only called until then.
     """
+    index = get_index()
+    if index is not None:
+        country = index.lookup(query)
+        if country is None:
+            return {"message": f"No country found matching '{query}'"}
+        return _format_country(country)
+
     try:
         url = f"https://restcountries.com/v3.1/name/{query}"
-        response = requests.get(url, timeout=10)
+        response = http_get(url, timeout=10)
         
         if response.status_code == 404:
             return {"message": f"No country found matching '{query}'"}
@@ -19,30 +54,6 @@ def search_country(query: str) -> dict:
         if not data:
             return {"message": f"No country found matching '{query}'"}
         
-        country = data[0]
-        
-        currencies = []
-        if country.get("currencies"):
-            for code, info in country.get("currencies", {}).items():
-                currencies.append(f"{info.get('name', '')} ({code})")
-        
-        languages = []
-        if country.get("languages"):
-            languages = list(country.get("languages", {}).values())
-        
-        return {
-            "name": country.get("name", {}).get("common", "Unknown"),
-            "official_name": country.get("name", {}).get("official", "Unknown"),
-            "capital": country.get("capital", ["N/A"])[0] if country.get("capital") else "N/A",
-            "region": country.get("region", "N/A"),
-            "subregion": country.get("subregion", "N/A"),
-            "population": country.get("population", "N/A"),
-            "area_km2": country.get("area", "N/A"),
-            "currencies": currencies,
-            "languages": languages[:5],
-            "flag_emoji": country.get("flag", ""),
-            "map_url": country.get("maps", {}).get("googleMaps", ""),
-            "source": "REST Countries API"
-        }
+        return _format_country(data[0])
     except Exception as e:
         return {"error": f"Country search failed: {str(e)}"}
@@ -0,0 +1,275 @@
+import bisect
+import difflib
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+
+from http_session import http_get
+
+# The whole REST Countries dataset (~250 records) is kept in memory and
+# searched locally. It is loaded from a snapshot file at startup and
+# refreshed in the background when the snapshot is missing or older than
+# REFRESH_SECONDS; until a snapshot exists, lookups fall back to the API.
+SNAPSHOT_PATH = os.environ.get("COUNTRY_SNAPSHOT_PATH", os.path.join(".cache", "countries.json"))
+REFRESH_SECONDS = float(os.environ.get("COUNTRY_SNAPSHOT_REFRESH_SECONDS", str(30 * 24 * 3600)))
+# Failed refreshes are retried no more often than this.
+RETRY_SECONDS = 600
+SNAPSHOT_URL = "https://restcountries.com/v3.1/all"
+# /all accepts at most 10 fields per request, so the snapshot is fetched in
+# two halves and joined on cca3.
+SNAPSHOT_FIELDS = [
+    "name,cca2,cca3,altSpellings,capital,region,subregion,population,area",
+    "cca3,currencies,languages,flag,maps",
+]
+FUZZY_CUTOFF = 0.82
+# Shortest query that may resolve as the prefix of a name ("germ" ->
+# Germany); shorter ones ("man") match far too much.
+MIN_PREFIX = 4
+# Capitals are often ordinary words ("Malé", "Victoria", "Lima"), so they
+# only count as mentions when the text also has one of these cues.
+CAPITAL_CUES = frozenset({
+    "capital", "country", "countries", "nation", "population", "currency",
+    "flag", "language", "languages", "citizens", "president",
+})
+
+# Everyday names that are not in the dataset's own altSpellings.
+ALIASES = {
+    "america": "USA",
+    "united states of america": "USA",
+    "britain": "GBR",
+    "great britain": "GBR",
+    "england": "GBR",
+    "scotland": "GBR",
+    "wales": "GBR",
+    "holland": "NLD",
+    "burma": "MMR",
+    "ivory coast": "CIV",
+    "czech republic": "CZE",
+    "east timor": "TLS",
+    "swaziland": "SWZ",
+    "macedonia": "MKD",
+    "vatican": "VAT",
+    "uae": "ARE",
+    "drc": "COD",
+}
+
+_NON_WORD = re.compile(r"[^\w\s]")
+
+
+def normalize(text: str) -> str:
+    """
+    Fold case and accents and drop punctuation: "Côte d'Ivoire" -> "cote divoire".
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_NON_WORD.sub("", text).split())
+
+
+class CountryIndex:
+    """
+    Exact, alias, prefix and fuzzy lookup over country records by common
+    name, official name, ISO code and capital.
+    """
+
+    def __init__(self, countries: list):
+        self.countries = countries
+        self._keys = {}
+        self._mention_keys = {}
+        self._capital_keys = {}
+        self._longest_mention = 1
+        for i, country in enumerate(countries):
+            names = country.get("name", {})
+            for name in [names.get("common"), names.get("official")]:
+                self._add(name, i, mention=True)
+            for capital in country.get("capital", []):
+                self._add(capital, i, mention=False)
+                key = normalize(capital)
+                if key:
+                    self._capital_keys.setdefault(key, i)
+                    self._longest_mention = max(self._longest_mention, len(key.split()))
+            for code in [country.get("cca2"), country.get("cca3")]:
+                self._add(code, i, mention=False)
+            # altSpellings mixes codes ("FR") with names ("French Republic").
+            for spelling in country.get("altSpellings", []):
+                self._add(spelling, i, mention=len(spelling) > 3)
+        by_code = {country.get("cca3"): i for i, country in enumerate(countries)}
+        for alias, code in ALIASES.items():
+            if code in by_code:
+                self._add(alias, by_code[code], mention=True)
+        self._sorted = sorted(key for key in self._keys if len(key) > 3)
+
+    def _add(self, text, i: int, mention: bool) -> None:
+        key = normalize(text or "")
+        if not key:
+            return
+        self._keys.setdefault(key, i)
+        if mention:
+            self._mention_keys.setdefault(key, i)
+            self._longest_mention = max(self._longest_mention, len(key.split()))
+
+    def __len__(self) -> int:
+        return len(self.countries)
+
+    def lookup(self, query: str):
+        """
+        Return the best matching country record, or None.
+        """
+        key = normalize(query)
+        if not key:
+            return None
+        if key in self._keys:
+            return self.countries[self._keys[key]]
+        if len(key) >= MIN_PREFIX:
+            start = bisect.bisect_left(self._sorted, key)
+            if start < len(self._sorted) and self._sorted[start].startswith(key):
+                return self.countries[self._keys[self._sorted[start]]]
+        mentions = self.find_mentions(query)
+        if mentions:
+            return mentions[0]
+        if len(key) >= 4:
+            # Only compare against keys of similar length sharing the first letter.
+            candidates = [
+                name for name in self._sorted
+                if name[0] == key[0] and abs(len(name) - len(key)) <= 2
+            ]
+            close = difflib.get_close_matches(key, candidates, n=1, cutoff=FUZZY_CUTOFF)
+            if close:
+                return self.countries[self._keys[close[0]]]
+        return None
+
+    def find_mentions(self, text: str) -> list:
+        """
+        Countries named anywhere in the text, longest names first.
+        ISO codes are ignored here: "in", "is" and "it" are ordinary words,
+        and capitals only count next to a cue such as "capital".
+        """
+        words = normalize(text).split()
+        with_capitals = not CAPITAL_CUES.isdisjoint(words)
+        found = []
+        seen = set()
+        for size in range(min(self._longest_mention, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                phrase = " ".join(words[start:start + size])
+                i = self._mention_keys.get(phrase)
+                if i is None and with_capitals:
+                    i = self._capital_keys.get(phrase)
+                if i is not None and i not in seen:
+                    seen.add(i)
+                    found.append(self.countries[i])
+        return found
+
+    def mentions_country(self, text: str) -> bool:
+        return bool(self.find_mentions(text))
+
+
+_index = None
+_loaded_at = 0.0
+_started = False
+_refreshing = False
+_last_attempt = 0.0
+_lock = threading.Lock()
+
+
+def _read_snapshot():
+    try:
+        with open(SNAPSHOT_PATH, encoding="utf-8") as f:
+            return json.load(f), os.path.getmtime(SNAPSHOT_PATH)
+    except (OSError, ValueError):
+        return None, 0.0
+
+
+def _fetch_snapshot() -> list:
+    merged = {}
+    for fields in SNAPSHOT_FIELDS:
+        response = http_get(SNAPSHOT_URL, params={"fields": fields}, timeout=20)
+        response.raise_for_status()
+        for country in response.json():
+            merged.setdefault(country.get("cca3"), {}).update(country)
+    return list(merged.values())
+
+
+def refresh_snapshot() -> bool:
+    """
+    Download a fresh snapshot, write it atomically and swap it in.
+    """
+    global _index, _loaded_at
+    try:
+        countries = _fetch_snapshot()
+        if not countries:
+            return False
+        directory = os.path.dirname(SNAPSHOT_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{SNAPSHOT_PATH}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(countries, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, SNAPSHOT_PATH)
+    except Exception:
+        return False
+    index = CountryIndex(countries)
+    with _lock:
+        _index = index
+        _loaded_at = time.time()
+    return True
+
+
+def _refresh_in_background() -> None:
+    global _refreshing
+    try:
+        refresh_snapshot()
+    finally:
+        with _lock:
+            _refreshing = False
+
+
+def _maybe_refresh() -> None:
+    global _refreshing, _last_attempt
+    now = time.time()
+    with _lock:
+        stale = _index is None or now - _loaded_at > REFRESH_SECONDS
+        if not stale or _refreshing or now - _last_attempt < RETRY_SECONDS:
+            return
+        _refreshing = True
+        _last_attempt = now
+    threading.Thread(target=_refresh_in_background, name="country-snapshot", daemon=True).start()
+
+
+def load_index() -> None:
+    """
+    Load the snapshot from disk, if there is one, and schedule a refresh
+    when it is missing or stale.
+    """
+    global _index, _loaded_at, _started
+    _started = True
+    countries, mtime = _read_snapshot()
+    if countries:
+        index = CountryIndex(countries)
+        with _lock:
+            if _index is None:
+                _index = index
+                _loaded_at = mtime
+    _maybe_refresh()
+
+
+def get_index():
+    """
+    Return the in-memory country index, or None while no snapshot is available.
+    """
+    if not _started:
+        load_index()
+    else:
+        _maybe_refresh()
+    return _index
+
+
+def mentions_country(text: str):
+    """
+    True/False if the text names a country, or None when no index is loaded.
+    """
+    index = get_index()
+    if index is None:
+        return None
+    return index.mentions_country(text)
@@ -0,0 +1,160 @@
+import gzip
+import os
+import re
+import threading
+
+from dictionary_service import get_definition
+import result_cache
+
+# Most queries are questions, so their first word is "what", "how" or a
+# name. This stage picks the word the user most likely wants defined and
+# only asks the API about words that could be in a dictionary: not a
+# stopword, shaped like a word, in the bundled lexicon and not already
+# known to 404. DICTIONARY_LEXICON_PATH points at another word list (plain
+# or gzipped, one word per line); see data/README.md for the default's
+# sources.
+LEXICON_PATH = os.environ.get(
+    "DICTIONARY_LEXICON_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "english_words.txt.gz"),
+)
+MAX_CANDIDATES = 2
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before
+being below between both but by can could did do does doing down during each few for
+from further had has have having he her here hers herself him himself his how i if in
+into is it its itself just let me more most my myself no nor not now of off on once only
+or other our ours ourselves out over own same she should so some such than that the
+their theirs them themselves then there these they this those through to too under
+until up very was we were what when where which while who whom why will with would you
+your yours yourself yourselves whats whos hows tell show give find get please know
+explain describe mean means meaning define definition word term does did say said
+""".split())
+
+# "define X", "meaning of X", "what does X mean", "definition of X".
+_DEFINE_PATTERN = re.compile(
+    r"\b(?:define|definition of|meaning of|what does|what is the meaning of|synonyms? (?:of|for))\s+"
+    r"[\"']?([A-Za-z][A-Za-z'-]*)",
+    re.IGNORECASE,
+)
+_WORD_SHAPE = re.compile(r"^[a-z][a-z'-]{0,29}$")
+
+_lexicon = None
+_lexicon_loaded = False
+_lock = threading.Lock()
+_stats = {"lookups": 0, "skipped": 0, "negative_hits": 0, "upstream": 0}
+
+
+def _load_lexicon():
+    """
+    Return the word list as a set, or None if it cannot be read.
+    """
+    global _lexicon, _lexicon_loaded
+    if not _lexicon_loaded:
+        with _lock:
+            if not _lexicon_loaded:
+                try:
+                    opener = gzip.open if LEXICON_PATH.endswith(".gz") else open
+                    with opener(LEXICON_PATH, "rt", encoding="utf-8", errors="ignore") as f:
+                        _lexicon = frozenset(line.strip().casefold() for line in f if line.strip())
+                except OSError:
+                    _lexicon = None
+                _lexicon_loaded = True
+    return _lexicon
+
+
+def _in_lexicon(word: str) -> bool:
+    lexicon = _load_lexicon()
+    return lexicon is not None and word in lexicon
+
+
+def is_plausible_word(word: str) -> bool:
+    """
+    True if `word` is worth sending to the dictionary API.
+    """
+    if word in STOPWORDS or not _WORD_SHAPE.match(word):
+        return False
+    lexicon = _load_lexicon()
+    return lexicon is None or word in lexicon
+
+
+def select_headwords(query: str) -> list:
+    """
+    Candidate words to define, best first.
+    """
+    m = _DEFINE_PATTERN.search(query)
+    if m:
+        word = m.group(1).casefold().strip("'-")
+        # "what does the fox say" names no headword after the phrase.
+        if is_plausible_word(word):
+            return [word]
+
+    words = [w.strip(".,!?;:\"()") for w in query.split()]
+    words = [w for w in words if w]
+    candidates = []
+    for i, word in enumerate(words):
+        lowered = word.casefold()
+        # A capitalised word mid-sentence is usually a name, not a headword,
+        # unless it is a known word on its own ("what is Python", but not
+        # "Barack Obama").
+        if i > 0 and word[:1].isupper() and len(words) > 2:
+            # The first word is capitalised anyway, so it says nothing.
+            beside = words[i + 1:i + 2] + (words[i - 1:i] if i > 1 else [])
+            next_to_name = any(other[:1].isupper() for other in beside)
+            if next_to_name or not _in_lexicon(lowered):
+                continue
+        if is_plausible_word(lowered) and lowered not in candidates:
+            candidates.append(lowered)
+    return candidates[:MAX_CANDIDATES]
+
+
+def _not_found(query: str) -> dict:
+    return {"message": f"No definition found for '{query}'"}
+
+
+def define_word(word: str) -> dict:
+    """
+    Definition of one word, with long-lived positive and negative caches.
+    """
+    definition = result_cache.lookup("dictionary_word", (word,))
+    if definition is not result_cache.MISS:
+        return definition
+    if result_cache.lookup("dictionary_miss", (word,)) is not result_cache.MISS:
+        with _lock:
+            _stats["negative_hits"] += 1
+        return _not_found(word)
+
+    with _lock:
+        _stats["upstream"] += 1
+    definition = get_definition(word)
+    if "message" in definition:
+        result_cache.store("dictionary_miss", (word,), True)
+    else:
+        result_cache.store("dictionary_word", (word,), definition)
+    return definition
+
+
+def define_query(query: str) -> dict:
+    """
+    Define the most likely headword in a free-text query.
+    """
+    with _lock:
+        _stats["lookups"] += 1
+    candidates = select_headwords(query)
+    if not candidates:
+        with _lock:
+            _stats["skipped"] += 1
+        return _not_found(query)
+
+    result = None
+    for word in candidates:
+        result = define_word(word)
+        if "message" not in result:
+            return result
+    return result
+
+
+def dictionary_stats() -> dict:
+    lexicon = _load_lexicon()
+    with _lock:
+        return {**_stats, "lexicon_words": len(lexicon) if lexicon is not None else 0}
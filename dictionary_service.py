@@ -1,4 +1,4 @@
-import requests
+from http_session import http_get
 
 
 def get_definition(word: str) -> dict:
@@ -8,7 +8,7 @@ def get_definition(word: str) -> dict:
     """
     try:
         url = f"https://api.dictionaryapi.dev/api/v2/entries/en/{word}"
-        response = requests.get(url, timeout=10)
+        response = http_get(url, timeout=10)
         
         if response.status_code == 404:
             return {"message": f"No definition found for '{word}'"}
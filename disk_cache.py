@@ -0,0 +1,214 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+
+# SQLite (WAL mode) tier behind the in-memory result cache. All Streamlit
+# processes on a host open the same file, so results fetched by one replica
+# are served by the others and survive restarts and deploys.
+CACHE_PATH = os.environ.get("DISK_CACHE_PATH", os.path.join(".cache", "search_results.sqlite3"))
+ENABLED = os.environ.get("DISK_CACHE_ENABLED", "1") == "1"
+MAX_BYTES = int(os.environ.get("DISK_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+COMPACT_INTERVAL = float(os.environ.get("DISK_CACHE_COMPACT_SECONDS", "300"))
+# Access times are only rewritten when this stale, to keep reads cheap.
+TOUCH_INTERVAL = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_expires ON results (expires_at);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed_at);
+"""
+
+
+class DiskCache:
+    """
+    Cross-process result store. Reads use a connection per thread; writes,
+    access-time updates and compaction are funneled through one background
+    writer thread so callers never wait on the write lock.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = MAX_BYTES,
+                 compact_interval: float = COMPACT_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compact_interval = compact_interval
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.compacted = 0
+        self._local = threading.local()
+        self._writes = queue.Queue()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        self._writer = threading.Thread(target=self._write_loop, name="disk-cache-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=0.25, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str):
+        """
+        Return (payload, expires_at) for a live entry, or None.
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT payload, expires_at, accessed_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        now = time.time()
+        if row is None or row[1] <= now:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if now - row[2] > TOUCH_INTERVAL:
+            self._writes.put(("touch", key, now))
+        return zlib.decompress(row[0]).decode("utf-8"), row[1]
+
+    def peek_expiry(self, key: str):
+        """
+        Expiry time of a live entry, or None, without reading its payload.
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None or row[0] <= time.time():
+            return None
+        return row[0]
+
+    def put(self, key: str, source: str, payload: str, expires_at: float) -> None:
+        """
+        Queue a payload for storage; returns immediately.
+        """
+        blob = zlib.compress(payload.encode("utf-8"))
+        self._writes.put(("put", key, source, blob, expires_at))
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        next_compaction = time.time() + self.compact_interval
+        while True:
+            timeout = max(0.0, next_compaction - time.time())
+            batch = []
+            try:
+                batch.append(self._writes.get(timeout=timeout))
+                while len(batch) < 256:
+                    batch.append(self._writes.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                self._apply(conn, batch)
+            if time.time() >= next_compaction:
+                self.compact(conn)
+                next_compaction = time.time() + self.compact_interval
+
+    def _apply(self, conn: sqlite3.Connection, batch: list) -> None:
+        now = time.time()
+        try:
+            with conn:
+                conn.execute("BEGIN")
+                for op in batch:
+                    if op[0] == "put":
+                        _, key, source, blob, expires_at = op
+                        conn.execute(
+                            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                            (key, source, expires_at, now, blob)
+                        )
+                        self.writes += 1
+                    else:
+                        _, key, accessed_at = op
+                        conn.execute(
+                            "UPDATE results SET accessed_at = ? WHERE key = ?", (accessed_at, key)
+                        )
+        except sqlite3.Error:
+            pass
+
+    def compact(self, conn: sqlite3.Connection = None) -> None:
+        """
+        Drop expired rows, then least-recently-used rows until under max_bytes.
+        """
+        conn = conn or self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN")
+                removed = conn.execute(
+                    "DELETE FROM results WHERE expires_at <= ?", (time.time(),)
+                ).rowcount
+                total = conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(payload)), 0) FROM results"
+                ).fetchone()[0]
+                while total > self.max_bytes:
+                    rows = conn.execute(
+                        "SELECT key, LENGTH(payload) FROM results ORDER BY accessed_at LIMIT 100"
+                    ).fetchall()
+                    if not rows:
+                        break
+                    for key, size in rows:
+                        conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                        removed += 1
+                        total -= size
+                        if total <= self.max_bytes:
+                            break
+                self.compacted += removed
+        except sqlite3.Error:
+            pass
+
+    def stats(self) -> dict:
+        try:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM results"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, size = None, None
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "compacted": self.compacted,
+            "pending_writes": self._writes.qsize(),
+        }
+
+
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+_disk_cache_failed = False
+
+
+def get_disk_cache():
+    """
+    Return the shared DiskCache, or None if disabled or the file can't be opened.
+    """
+    global _disk_cache, _disk_cache_failed
+    if not ENABLED or _disk_cache_failed:
+        return None
+    if _disk_cache is None:
+        with _disk_cache_lock:
+            if _disk_cache is None and not _disk_cache_failed:
+                try:
+                    _disk_cache = DiskCache()
+                except (OSError, sqlite3.Error):
+                    _disk_cache_failed = True
+    return _disk_cache
@@ -1,5 +1,11 @@
 from ddgs import DDGS
 
+from client_pool import get_pool
+
+# DDGS instances are reused across queries and sessions instead of being
+# rebuilt (with a fresh HTTP session) for every call.
+_ddgs_pool = get_pool("ddgs", lambda _: DDGS())
+
 
 def search_duckduckgo(query: str, max_results: int = 5) -> list:
     """
@@ -7,14 +13,14 @@ def search_duckduckgo(query: str, max_results: int = 5) -> list:
     Returns a list of search results.
     """
     try:
-        ddgs = DDGS()
         results = []
-        for r in ddgs.text(query, max_results=max_results):
-            results.append({
-                "title": r.get("title", ""),
-                "body": r.get("body", ""),
-                "url": r.get("href", "")
-            })
+        with _ddgs_pool.client() as ddgs:
+            for r in ddgs.text(query, max_results=max_results):
+                results.append({
+                    "title": r.get("title", ""),
+                    "body": r.get("body", ""),
+                    "url": r.get("href", "")
+                })
         return results if results else [{"message": "No web results found"}]
     except Exception as e:
         return [{"error": f"DuckDuckGo search failed: {str(e)}"}]
@@ -25,8 +31,8 @@ def get_instant_answer(query: str) -> dict:
     Get instant answer from DuckDuckGo.
     """
     try:
-        ddgs = DDGS()
-        results = ddgs.answers(query)
+        with _ddgs_pool.client() as ddgs:
+            results = ddgs.answers(query)
         if results:
             return {
                 "answer": results[0].get("text", ""),
@@ -42,16 +48,16 @@ def search_news(query: str, max_results: int = 5) -> list:
     Search DuckDuckGo for news results.
     """
     try:
-        ddgs = DDGS()
         results = []
-        for r in ddgs.news(query, max_results=max_results):
-            results.append({
-                "title": r.get("title", ""),
-                "body": r.get("body", ""),
-                "url": r.get("url", ""),
-                "source": r.get("source", ""),
-                "date": r.get("date", "")
-            })
+        with _ddgs_pool.client() as ddgs:
+            for r in ddgs.news(query, max_results=max_results):
+                results.append({
+                    "title": r.get("title", ""),
+                    "body": r.get("body", ""),
+                    "url": r.get("url", ""),
+                    "source": r.get("source", ""),
+                    "date": r.get("date", "")
+                })
         return results if results else [{"message": "No news found"}]
     except Exception as e:
         return [{"error": f"DuckDuckGo news search failed: {str(e)}"}]
@@ -1,4 +1,7 @@
-import requests
+from quota_scheduler import conditional_get, get_quota, QuotaExhausted
+
+# Unauthenticated search allows about 10 calls a minute.
+_search_quota = get_quota("github_search")
 
 
 def search_github_repos(query: str, limit: int = 5) -> list:
@@ -19,10 +22,7 @@ def search_github_repos(query: str, limit: int = 5) -> list:
             "User-Agent": "MultiSearchChatbot/1.0"
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = conditional_get(_search_quota, url, params=params, headers=headers, timeout=10)
         items = data.get("items", [])
         
         if not items:
@@ -41,5 +41,7 @@ def search_github_repos(query: str, limit: int = 5) -> list:
             })
         
         return repos
+    except QuotaExhausted as e:
+        return [{"error": f"GitHub search skipped: {str(e)}", "rate_limited": True}]
     except Exception as e:
         return [{"error": f"GitHub search failed: {str(e)}"}]
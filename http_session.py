@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from request_context import cap_timeout, current_source
+import rate_limiter
+import retry_policy
+
+# One pool per host; each pool keeps up to POOL_MAXSIZE idle keep-alive
+# connections so the fan-out in search_all_sources reuses TLS sessions.
+POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", "32"))
+POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", "16"))
+POOL_BLOCK = os.environ.get("HTTP_POOL_BLOCK", "0") == "1"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "MultiSearchChatbot/1.0 (contact@example.com)"
+}
+
+_session = None
+_session_lock = threading.Lock()
+# Bytes received per search source, as sent on the wire (before decompression).
+_transfer = {}
+_transfer_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """
+    Create a session with keep-alive connection pools for http and https.
+    """
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        pool_block=POOL_BLOCK
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide pooled session, creating it on first use.
+    Shared by every service module and every Streamlit session.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def http_get(url: str, params=None, headers=None, timeout: float = 10, **kwargs) -> requests.Response:
+    """
+    Drop-in replacement for requests.get that goes through the shared pool.
+    Each attempt waits for the host's rate limiter and has its timeout
+    capped to the caller's remaining deadline, if any. Transient failures
+    are retried according to the current source's retry policy.
+    """
+    source = current_source()
+    policy = retry_policy.policy_for(source)
+    host = urlsplit(url).hostname
+    retry_policy.record_call(source)
+    attempt = 0
+    while True:
+        attempt += 1
+        rate_limiter.acquire(host)
+        try:
+            response = get_session().get(
+                url, params=params, headers=headers, timeout=cap_timeout(timeout), **kwargs
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            delay = retry_policy.should_retry(source, policy, "GET", attempt)
+            if delay is None:
+                raise
+            time.sleep(delay)
+            continue
+        delay = None
+        if response.status_code in policy.statuses:
+            delay = retry_policy.should_retry(source, policy, "GET", attempt, response)
+        if delay is None:
+            break
+        response.close()
+        time.sleep(delay)
+
+    if not kwargs.get("stream"):
+        record_transfer(response)
+    return response
+
+
+def record_transfer(response: requests.Response) -> None:
+    """
+    Add a fully read response's size to the current source's traffic.
+    Streaming callers call this themselves once they are done reading.
+    """
+    try:
+        size = response.raw.tell() or len(response.content)
+    except Exception:
+        size = 0
+    source = current_source() or "other"
+    with _transfer_lock:
+        stats = _transfer.setdefault(source, {"requests": 0, "bytes": 0})
+        stats["requests"] += 1
+        stats["bytes"] += size
+
+
+def transfer_stats() -> dict:
+    """
+    Requests and bytes received per source, with the average response size.
+    """
+    with _transfer_lock:
+        return {
+            source: {**stats, "bytes_per_request": stats["bytes"] / stats["requests"]}
+            for source, stats in _transfer.items()
+        }
+
+
+def reset_session() -> None:
+    """
+    Close all pooled connections, e.g. after changing pool limits.
+    """
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
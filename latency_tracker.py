@@ -0,0 +1,157 @@
+import os
+import threading
+from collections import deque
+
+# Rolling per-source latency samples drive two things:
+#  - adaptive timeouts: p99 x TIMEOUT_MARGIN, clamped to [MIN_TIMEOUT, the
+#    caller's budget], once MIN_SAMPLES calls have been seen;
+#  - hedging: a duplicate request once a call runs past p95, paid for from a
+#    per-host budget that earns HEDGE_RATIO of a hedge per call, so hedges
+#    stay a small fraction of each host's traffic.
+SAMPLE_SIZE = int(os.environ.get("LATENCY_SAMPLE_SIZE", "200"))
+MIN_SAMPLES = int(os.environ.get("LATENCY_MIN_SAMPLES", "20"))
+TIMEOUT_MARGIN = float(os.environ.get("LATENCY_TIMEOUT_MARGIN", "1.5"))
+MIN_TIMEOUT = float(os.environ.get("LATENCY_MIN_TIMEOUT", "0.5"))
+HEDGE_PERCENTILE = 95
+HEDGE_RATIO = float(os.environ.get("HEDGE_RATIO", "0.1"))
+HEDGE_BURST = 3.0
+# Never hedged: the location pipeline coalesces identical calls in its own
+# caches, so a duplicate would only wait on the same stalled request, and
+# Nominatim's usage policy (1 request/s) leaves no room for duplicates.
+# GitHub and StackExchange have small hourly/daily quotas that a
+# duplicate request would spend.
+UNHEDGED_SOURCES = frozenset({"geocoding", "weather", "air_quality", "github", "stackoverflow"})
+
+# Hedge budgets are shared by every source that talks to the same host.
+SOURCE_HOSTS = {
+    "arxiv": "export.arxiv.org",
+    "duckduckgo": "duckduckgo.com",
+    "duckduckgo_instant": "duckduckgo.com",
+    "news": "duckduckgo.com",
+    "wikipedia": "en.wikipedia.org",
+    "weather": "api.open-meteo.com",
+    "air_quality": "air-quality-api.open-meteo.com",
+    "wikidata": "www.wikidata.org",
+    "books": "openlibrary.org",
+    "pubmed": "eutils.ncbi.nlm.nih.gov",
+    "geocoding": "nominatim.openstreetmap.org",
+    "dictionary": "api.dictionaryapi.dev",
+    "country": "restcountries.com",
+    "quotes": "api.quotable.io",
+    "github": "api.github.com",
+    "stackoverflow": "api.stackexchange.com",
+}
+
+
+class LatencyHistogram:
+    """
+    Fixed-size window of recent latencies for one source.
+    """
+
+    def __init__(self, size: int = SAMPLE_SIZE):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, p: float):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * p / 100))
+        return samples[index]
+
+
+_histograms = {}
+_hedge_tokens = {}
+_hedge_stats = {"hedged": 0, "hedge_wins": 0, "denied": 0}
+_lock = threading.Lock()
+
+
+def _histogram(source: str) -> LatencyHistogram:
+    histogram = _histograms.get(source)
+    if histogram is None:
+        with _lock:
+            histogram = _histograms.setdefault(source, LatencyHistogram())
+    return histogram
+
+
+def record_latency(source: str, seconds: float) -> None:
+    """
+    Record one completed upstream call and earn hedge budget for its host.
+    """
+    _histogram(source).add(seconds)
+    host = SOURCE_HOSTS.get(source, source)
+    with _lock:
+        _hedge_tokens[host] = min(HEDGE_BURST, _hedge_tokens.get(host, 0.0) + HEDGE_RATIO)
+
+
+def adaptive_timeout(source: str, budget: float) -> float:
+    """
+    Timeout for the next call: p99 x margin, never above `budget`.
+    """
+    histogram = _histogram(source)
+    if len(histogram) < MIN_SAMPLES:
+        return budget
+    p99 = histogram.percentile(99)
+    return min(budget, max(MIN_TIMEOUT, p99 * TIMEOUT_MARGIN))
+
+
+def hedge_delay(source: str):
+    """
+    Seconds to wait before hedging a call, or None while there is too little
+    data or the source is never hedged.
+    """
+    if source in UNHEDGED_SOURCES:
+        return None
+    histogram = _histogram(source)
+    if len(histogram) < MIN_SAMPLES:
+        return None
+    return histogram.percentile(HEDGE_PERCENTILE)
+
+
+def try_hedge(source: str) -> bool:
+    """
+    Spend one hedge from the source host's budget, if it has one to spare.
+    """
+    host = SOURCE_HOSTS.get(source, source)
+    with _lock:
+        tokens = _hedge_tokens.get(host, 0.0)
+        if tokens < 1.0:
+            _hedge_stats["denied"] += 1
+            return False
+        _hedge_tokens[host] = tokens - 1.0
+        _hedge_stats["hedged"] += 1
+        return True
+
+
+def record_hedge_win() -> None:
+    with _lock:
+        _hedge_stats["hedge_wins"] += 1
+
+
+def latency_stats() -> dict:
+    """
+    Per-source percentiles and current timeouts, plus hedging counters.
+    """
+    with _lock:
+        sources = list(_histograms)
+        hedging = dict(_hedge_stats)
+    return {
+        "sources": {
+            source: {
+                "samples": len(_histograms[source]),
+                "p50": _histograms[source].percentile(50),
+                "p95": _histograms[source].percentile(95),
+                "p99": _histograms[source].percentile(99),
+            }
+            for source in sources
+        },
+        "hedging": hedging,
+    }
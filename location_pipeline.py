@@ -0,0 +1,153 @@
+import re
+
+from ai_service import extract_location, KEYWORD_CATEGORIES
+from nominatim_service import geocode_location, reverse_geocode
+from weather_service import get_weather_open_meteo, get_weather_wttr
+from openaq_service import get_air_quality_by_coordinates
+import result_cache
+
+# A location query is resolved to coordinates once; weather and air quality
+# are then looked up by (rounded) coordinates, so "Lisbon", "lisbon, PT"
+# and "is it raining in Lisbon today" all share one geocode and one
+# forecast in the cache.
+COORD_PRECISION = 2
+
+# Phrases that describe what is being asked rather than where, matched as
+# whole words (with plain inflections: "raining", "forecasts"), so places
+# such as Istanbul, Airdrie or Mapleton are left alone.
+_LOCATION_CATEGORIES = ("weather", "air", "location")
+_TOPIC_PHRASES = re.compile(
+    r"\b(?:"
+    + "|".join(
+        re.escape(phrase)
+        for category in _LOCATION_CATEGORIES
+        for phrase in sorted(KEYWORD_CATEGORIES[category]["keywords"], key=len, reverse=True)
+    )
+    + r")(?:s|es|ing|y|ed)?(?!\w)",
+    re.IGNORECASE,
+)
+# Nominatim place_rank below a city's (16) is a country, state or region.
+SETTLEMENT_RANK = 16
+_FILLER_WORDS = {
+    "what", "whats", "what's", "how", "is", "it", "it's", "the", "a", "an", "of", "like",
+    "in", "at", "for", "near", "around", "will", "be", "does", "do", "going", "to",
+    "today", "tonight", "now", "right", "currently", "current", "tomorrow",
+    "this", "week", "weekend", "morning", "afternoon", "evening", "there",
+    "me", "show", "tell", "get", "check", "please", "hot", "cold", "outside",
+    "where", "where's", "wheres",
+}
+_PUNCTUATION = re.compile(r"^[^\w]+|[^\w]+$")
+
+
+def extract_place(query: str):
+    """
+    Reduce a query such as "is it raining in Lisbon today?" to the place
+    it mentions ("Lisbon"), or None if nothing place-like is left.
+    """
+    text = _TOPIC_PHRASES.sub(" ", extract_location(query) or query)
+    words = []
+    for word in text.split():
+        bare = _PUNCTUATION.sub("", word)
+        if not bare or bare.casefold() in _FILLER_WORDS:
+            continue
+        words.append(bare)
+    return " ".join(words) or None
+
+
+def _round(value: float) -> float:
+    return round(float(value), COORD_PRECISION)
+
+
+@result_cache.cached("geocode_place")
+def geocode_place(place: str) -> dict:
+    """
+    Geocode a place name, cached for a long time and shared by every
+    location-based source.
+    """
+    return geocode_location(place)
+
+
+@result_cache.cached("reverse_geocoding")
+def _reverse_geocode(latitude: float, longitude: float) -> dict:
+    return reverse_geocode(latitude, longitude)
+
+
+@result_cache.cached("weather_coords")
+def _weather_at(latitude: float, longitude: float) -> dict:
+    return get_weather_open_meteo(latitude, longitude)
+
+
+@result_cache.cached("air_quality_coords")
+def _air_quality_at(latitude: float, longitude: float) -> dict:
+    return get_air_quality_by_coordinates(latitude, longitude)
+
+
+def _resolve(query: str):
+    """
+    Return (place, geocode) for a query; geocode is None if it failed.
+    """
+    place = extract_place(query)
+    if place is None:
+        return None, None
+    geo = geocode_place(place)
+    if result_cache.is_error_result(geo):
+        return place, None
+    return place, geo
+
+
+def _city_name(geo: dict, place: str) -> str:
+    city = geo.get("city", "N/A")
+    if city != "N/A":
+        return city
+    rank = geo.get("place_rank")
+    if rank is not None and int(rank) < SETTLEMENT_RANK:
+        # A country or region: its centroid's village is not the answer.
+        return geo.get("display_name", place).split(",")[0].strip() or place
+    # Only ask Nominatim again when the forward result named no settlement.
+    address = _reverse_geocode(_round(geo["latitude"]), _round(geo["longitude"]))
+    if not result_cache.is_error_result(address) and address.get("city", "N/A") != "N/A":
+        return address["city"]
+    return place
+
+
+def locate(query: str) -> dict:
+    """
+    Geocode the place mentioned in a query.
+    """
+    place, geo = _resolve(query)
+    if geo is None:
+        return {"error": f"Location '{place or query}' not found"}
+    return geo
+
+
+def weather_for_query(query: str) -> dict:
+    """
+    Current weather for the place in a query, looked up by coordinates.
+    Falls back to wttr.in's own place matching when geocoding fails.
+    """
+    place, geo = _resolve(query)
+    if geo is None:
+        return get_weather_wttr(place or query)
+
+    weather = _weather_at(_round(geo["latitude"]), _round(geo["longitude"]))
+    if result_cache.is_error_result(weather):
+        return get_weather_wttr(place)
+    temperature_c = weather.get("temperature_c")
+    if isinstance(temperature_c, (int, float)):
+        weather["temperature_f"] = round(temperature_c * 9 / 5 + 32, 1)
+    weather["location"] = _city_name(geo, place)
+    return weather
+
+
+def air_quality_for_query(query: str) -> dict:
+    """
+    Air quality at the place in a query, looked up by coordinates.
+    """
+    place, geo = _resolve(query)
+    if geo is None:
+        return {"error": f"Location '{place or query}' not found"}
+
+    air_quality = _air_quality_at(_round(geo["latitude"]), _round(geo["longitude"]))
+    if isinstance(air_quality, dict) and not result_cache.is_error_result(air_quality):
+        air_quality["city"] = _city_name(geo, place)
+    return air_quality
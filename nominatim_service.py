@@ -1,4 +1,4 @@
-import requests
+from http_session import http_get
 
 
 def geocode_location(query: str) -> dict:
@@ -17,7 +17,7 @@ def geocode_location(query: str) -> dict:
             "User-Agent": "MultiSearchChatbot/1.0 (contact@example.com)"
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_get(url, params=params, headers=headers, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -33,6 +33,7 @@ def geocode_location(query: str) -> dict:
             "latitude": float(result.get("lat", 0)),
             "longitude": float(result.get("lon", 0)),
             "type": result.get("type", "Unknown"),
+            "place_rank": result.get("place_rank"),
             "country": address.get("country", "N/A"),
             "state": address.get("state", "N/A"),
             "city": address.get("city") or address.get("town") or address.get("village", "N/A"),
@@ -58,7 +59,7 @@ def reverse_geocode(latitude: float, longitude: float) -> dict:
             "User-Agent": "MultiSearchChatbot/1.0 (contact@example.com)"
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_get(url, params=params, headers=headers, timeout=10)
         response.raise_for_status()
         
         data = response.json()
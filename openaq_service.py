@@ -1,4 +1,30 @@
-import requests
+from http_session import http_get
+
+# Stations shown per lookup; also the row count requested upstream.
+MAX_LOCATIONS = 5
+
+
+def _parse_locations(results: list, city: str) -> list:
+    measurements = []
+    for result in results[:MAX_LOCATIONS]:
+        location_data = {
+            "location": result.get("location", "Unknown"),
+            "city": result.get("city", city),
+            "country": result.get("country", "N/A"),
+            "measurements": []
+        }
+        
+        for m in result.get("measurements", []):
+            location_data["measurements"].append({
+                "parameter": m.get("parameter", "N/A"),
+                "value": m.get("value", "N/A"),
+                "unit": m.get("unit", "N/A"),
+                "last_updated": m.get("lastUpdated", "N/A")
+            })
+        
+        measurements.append(location_data)
+    
+    return measurements
 
 
 def get_air_quality(city: str) -> dict:
@@ -9,14 +35,14 @@ def get_air_quality(city: str) -> dict:
         url = "https://api.openaq.org/v2/latest"
         params = {
             "city": city,
-            "limit": 10,
+            "limit": MAX_LOCATIONS,
             "order_by": "lastUpdated"
         }
         headers = {
             "Accept": "application/json"
         }
         
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_get(url, params=params, headers=headers, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -29,29 +55,69 @@ def get_air_quality(city: str) -> dict:
                 "data": []
             }
         
-        measurements = []
-        for result in results[:5]:
-            location_data = {
-                "location": result.get("location", "Unknown"),
-                "city": result.get("city", city),
-                "country": result.get("country", "N/A"),
-                "measurements": []
-            }
-            
-            for m in result.get("measurements", []):
-                location_data["measurements"].append({
-                    "parameter": m.get("parameter", "N/A"),
-                    "value": m.get("value", "N/A"),
-                    "unit": m.get("unit", "N/A"),
-                    "last_updated": m.get("lastUpdated", "N/A")
-                })
-            
-            measurements.append(location_data)
-        
         return {
             "city": city,
-            "data": measurements,
+            "data": _parse_locations(results, city),
             "source": "OpenAQ"
         }
     except Exception as e:
         return {"error": f"OpenAQ fetch failed: {str(e)}"}
+
+
+# Open-Meteo's air quality model, in the order measurements are shown.
+# OpenAQ's keyless v2 API is gone, so lookups by coordinates use this
+# free, keyless endpoint instead.
+OPEN_METEO_AIR_QUALITY_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+OPEN_METEO_PARAMETERS = [
+    "us_aqi", "pm2_5", "pm10", "ozone", "nitrogen_dioxide", "sulphur_dioxide", "carbon_monoxide",
+]
+
+
+def get_air_quality_by_coordinates(latitude: float, longitude: float, city: str = None) -> dict:
+    """
+    Get current air quality at a point from Open-Meteo (free, no API key).
+    """
+    label = city or f"{latitude:.2f}, {longitude:.2f}"
+    try:
+        params = {
+            "latitude": latitude,
+            "longitude": longitude,
+            "current": ",".join(OPEN_METEO_PARAMETERS),
+            "timezone": "auto"
+        }
+        response = http_get(OPEN_METEO_AIR_QUALITY_URL, params=params, timeout=10)
+        response.raise_for_status()
+        
+        data = response.json()
+        current = data.get("current", {})
+        units = data.get("current_units", {})
+        
+        measurements = [
+            {
+                "parameter": parameter,
+                "value": current[parameter],
+                "unit": units.get(parameter, ""),
+                "last_updated": current.get("time", "N/A")
+            }
+            for parameter in OPEN_METEO_PARAMETERS
+            if current.get(parameter) is not None
+        ]
+        if not measurements:
+            return {
+                "city": label,
+                "message": f"No air quality data found near '{label}'",
+                "data": []
+            }
+        
+        return {
+            "city": label,
+            "data": [{
+                "location": f"{latitude:.2f}, {longitude:.2f}",
+                "city": label,
+                "country": "N/A",
+                "measurements": measurements
+            }],
+            "source": "Open-Meteo"
+        }
+    except Exception as e:
+        return {"error": f"Open-Meteo air quality fetch failed: {str(e)}"}
@@ -1,4 +1,8 @@
-import requests
+from http_session import http_get
+
+# Only the fields search results render; full docs carry dozens more,
+# and the isbn and subject arrays alone can run to hundreds of entries.
+SEARCH_FIELDS = "key,title,author_name,first_publish_year"
 
 
 def search_books(query: str, limit: int = 5) -> list:
@@ -9,10 +13,11 @@ def search_books(query: str, limit: int = 5) -> list:
         url = "https://openlibrary.org/search.json"
         params = {
             "q": query,
-            "limit": limit
+            "limit": limit,
+            "fields": SEARCH_FIELDS
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_get(url, params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -23,8 +28,6 @@ def search_books(query: str, limit: int = 5) -> list:
                 "title": doc.get("title", "Unknown"),
                 "authors": doc.get("author_name", ["Unknown"]),
                 "first_publish_year": doc.get("first_publish_year", "N/A"),
-                "isbn": doc.get("isbn", ["N/A"])[0] if doc.get("isbn") else "N/A",
-                "subjects": doc.get("subject", [])[:5] if doc.get("subject") else [],
                 "url": f"https://openlibrary.org{doc.get('key', '')}" if doc.get("key") else None
             }
             books.append(book)
@@ -40,7 +43,7 @@ def get_book_by_isbn(isbn: str) -> dict:
     """
     try:
         url = f"https://openlibrary.org/api/books?bibkeys=ISBN:{isbn}&format=json&jscmd=data"
-        response = requests.get(url, timeout=10)
+        response = http_get(url, timeout=10)
         response.raise_for_status()
         
         data = response.json()
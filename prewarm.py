@@ -0,0 +1,231 @@
+import functools
+import hashlib
+import os
+import threading
+import time
+from array import array
+
+import result_cache
+from search_engine import SOURCES, prefetch
+from source_router import plan_sources
+
+# Query popularity is tracked in a count-min sketch, with exact-ish counts
+# for the TOP_K hottest queries. A background thread refreshes their
+# cached results once REFRESH_AHEAD of the TTL has passed, so popular
+# queries are always served from the cache. Refreshes are paced to
+# REQUESTS_PER_MINUTE upstream calls. Counts are halved every
+# DECAY_SECONDS so yesterday's news gives way to today's.
+SKETCH_WIDTH = 4096
+SKETCH_DEPTH = 4
+TOP_K = int(os.environ.get("PREWARM_TOP_K", "200"))
+REQUESTS_PER_MINUTE = float(os.environ.get("PREWARM_REQUESTS_PER_MINUTE", "30"))
+TICK_SECONDS = float(os.environ.get("PREWARM_TICK_SECONDS", "15"))
+REFRESH_AHEAD = 0.8
+DECAY_SECONDS = 3600
+# A query/source whose refresh failed is retried after TICK_SECONDS,
+# doubling per consecutive failure up to MAX_BACKOFF_SECONDS (errors are
+# not cached, so without this it would be refetched on every tick).
+MAX_BACKOFF_SECONDS = 3600
+ENABLED = os.environ.get("PREWARM_ENABLED", "1") == "1"
+# Optional file of seed queries, one per line, warmed at startup.
+SEEDS_PATH = os.environ.get("PREWARM_SEEDS_PATH", "")
+
+SEED_QUERIES = [
+    "weather in london", "weather in new york", "weather in tokyo", "weather in paris",
+    "air quality in delhi", "python", "javascript", "machine learning",
+    "artificial intelligence", "covid-19", "diabetes", "climate change",
+    "united states", "india", "latest news",
+]
+
+
+class CountMinSketch:
+    """
+    Approximate frequency counts in fixed memory; never under-counts.
+    """
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        self._rows = [array("L", [0]) * width for _ in range(depth)]
+
+    def _indexes(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Count `key` and return its new estimate.
+        """
+        estimate = None
+        for row, i in zip(self._rows, self._indexes(key)):
+            row[i] += count
+            estimate = row[i] if estimate is None else min(estimate, row[i])
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[i] for row, i in zip(self._rows, self._indexes(key)))
+
+    def halve(self) -> None:
+        for row in self._rows:
+            for i in range(self.width):
+                row[i] >>= 1
+
+
+class QueryTracker:
+    """
+    Sketch plus the TOP_K hottest queries and the sources they ran.
+    """
+
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self._sketch = CountMinSketch()
+        self._top = {}
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def record(self, query: str, sources, count: int = 1) -> None:
+        query = result_cache.normalize_query(query)
+        if not query:
+            return
+        with self._lock:
+            estimate = self._sketch.add(query, count)
+            if query not in self._top and len(self._top) >= self.top_k:
+                coldest = min(self._top, key=self._top.get)
+                if self._top[coldest] >= estimate:
+                    return
+                del self._top[coldest]
+                self._sources.pop(coldest, None)
+            self._top[query] = estimate
+            self._sources[query] = list(sources)
+
+    def hottest(self) -> list:
+        """
+        [(query, count, sources)], most popular first.
+        """
+        with self._lock:
+            ranked = sorted(self._top.items(), key=lambda item: item[1], reverse=True)
+            return [(query, count, self._sources[query]) for query, count in ranked]
+
+    def decay(self) -> None:
+        with self._lock:
+            self._sketch.halve()
+            self._top = {query: count >> 1 for query, count in self._top.items()}
+
+
+_tracker = QueryTracker()
+_stats = {"ticks": 0, "refreshes": 0, "budget_exhausted": 0, "failures": 0, "backed_off": 0}
+# (query, source) -> (consecutive failures, monotonic time of next attempt)
+_backoff = {}
+_backoff_lock = threading.Lock()
+_started = False
+_start_lock = threading.Lock()
+
+
+def record_query(query: str, sources) -> None:
+    """
+    Count one search of `query` that ran `sources`.
+    """
+    _tracker.record(query, sources)
+
+
+def _due(name: str, query: str) -> bool:
+    age = result_cache.entry_age(name, SOURCES[name][1](query))
+    ttl = result_cache.SOURCE_TTLS.get(name, result_cache.DEFAULT_TTL)
+    return age is None or age >= REFRESH_AHEAD * ttl
+
+
+def _backing_off(key: tuple) -> bool:
+    with _backoff_lock:
+        entry = _backoff.get(key)
+    return entry is not None and time.monotonic() < entry[1]
+
+
+def _record_outcome(key: tuple, future) -> None:
+    ok = not future.cancelled() and future.exception() is None and future.result() is not False
+    with _backoff_lock:
+        if ok:
+            _backoff.pop(key, None)
+            return
+        failures = _backoff.get(key, (0, 0.0))[0] + 1
+        delay = min(MAX_BACKOFF_SECONDS, TICK_SECONDS * 2 ** failures)
+        _backoff[key] = (failures, time.monotonic() + delay)
+        _stats["failures"] += 1
+
+
+def _forget_cold(hot: set) -> None:
+    with _backoff_lock:
+        for key in [key for key in _backoff if key[0] not in hot]:
+            del _backoff[key]
+
+
+def _load_seeds() -> list:
+    seeds = list(SEED_QUERIES)
+    if SEEDS_PATH:
+        try:
+            with open(SEEDS_PATH, encoding="utf-8") as f:
+                seeds.extend(line.strip() for line in f if line.strip())
+        except OSError:
+            pass
+    return seeds
+
+
+def run_once(tokens: float) -> float:
+    """
+    Refresh due entries of the hottest queries while `tokens` last;
+    returns the tokens left.
+    """
+    hottest = _tracker.hottest()
+    _forget_cold({query for query, _, _ in hottest})
+    for query, _, sources in hottest:
+        for name in sources:
+            if name not in SOURCES or not _due(name, query):
+                continue
+            if _backing_off((query, name)):
+                _stats["backed_off"] += 1
+                continue
+            if tokens < 1:
+                _stats["budget_exhausted"] += 1
+                return tokens
+            tokens -= 1
+            _stats["refreshes"] += 1
+            future = prefetch(name, query)
+            future.add_done_callback(functools.partial(_record_outcome, (query, name)))
+    return tokens
+
+
+def _loop() -> None:
+    for seed in _load_seeds():
+        _tracker.record(seed, plan_sources(seed, record=False)["selected"])
+    tokens = REQUESTS_PER_MINUTE
+    next_decay = time.monotonic() + DECAY_SECONDS
+    while True:
+        try:
+            _stats["ticks"] += 1
+            tokens = run_once(tokens)
+            if time.monotonic() >= next_decay:
+                _tracker.decay()
+                next_decay = time.monotonic() + DECAY_SECONDS
+        except Exception:
+            pass
+        time.sleep(TICK_SECONDS)
+        tokens = min(REQUESTS_PER_MINUTE, tokens + REQUESTS_PER_MINUTE * TICK_SECONDS / 60)
+
+
+def start_prewarmer() -> None:
+    """
+    Start the background prewarm thread once per process.
+    """
+    global _started
+    if not ENABLED or _started:
+        return
+    with _start_lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_loop, name="prewarm", daemon=True).start()
+
+
+def prewarm_stats() -> dict:
+    return {**_stats, "tracked": len(_tracker.hottest())}
@@ -1,73 +1,114 @@
-import requests
+from http_session import http_get, record_transfer
+from request_batcher import get_batcher, wait
+import result_cache
 import xml.etree.ElementTree as ET
 
+ESEARCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+EFETCH_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+
+
+def _text(elem, path: str, default=None):
+    found = elem.find(path)
+    return found.text if found is not None and found.text is not None else default
+
+
+def _parse_article(article) -> dict:
+    """
+    Pull the fields we show out of one <PubmedArticle>, using direct paths
+    instead of scanning the whole subtree.
+    """
+    citation = article.find("MedlineCitation")
+    pmid = _text(citation, "PMID")
+    details = citation.find("Article")
+
+    authors = []
+    author_list = details.find("AuthorList")
+    for author in (author_list if author_list is not None else [])[:3]:
+        last_name = _text(author, "LastName")
+        if last_name is not None:
+            fore_name = _text(author, "ForeName")
+            authors.append(f"{fore_name} {last_name}" if fore_name is not None else last_name)
+
+    abstract_text = _text(details, "Abstract/AbstractText", "No abstract available")
+    if len(abstract_text) > 500:
+        abstract_text = abstract_text[:500] + "..."
+
+    return {
+        "title": _text(details, "ArticleTitle", "Unknown"),
+        "authors": authors,
+        "abstract": abstract_text,
+        "year": _text(details, "Journal/JournalIssue/PubDate/Year", "N/A"),
+        "pmid": pmid or "N/A",
+        "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/" if pmid else None
+    }
+
+
+def _fetch_articles(pmids: list) -> dict:
+    """
+    One efetch for a batch of PMIDs, stream-parsed: each article is parsed
+    as soon as its closing tag arrives and then discarded.
+    """
+    params = {
+        "db": "pubmed",
+        "id": ",".join(pmids),
+        "retmode": "xml"
+    }
+    response = http_get(EFETCH_URL, params=params, timeout=15, stream=True)
+    try:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        articles = {}
+        for _, elem in ET.iterparse(response.raw, events=("end",)):
+            if elem.tag == "PubmedArticle":
+                article = _parse_article(elem)
+                articles[article["pmid"]] = article
+                elem.clear()
+        for pmid, article in articles.items():
+            result_cache.store("pubmed_article", (pmid,), article)
+        return articles
+    finally:
+        record_transfer(response)
+        response.close()
+
+
+# PMIDs wanted by concurrent searches share efetch calls.
+_efetch = get_batcher("pubmed_efetch", _fetch_articles, max_batch=200)
+
 
 def search_pubmed(query: str, max_results: int = 5) -> list:
     """
     Search PubMed for medical and life sciences research.
     """
     try:
-        search_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
         search_params = {
             "db": "pubmed",
             "term": query,
             "retmax": max_results,
             "retmode": "json"
         }
-        
-        search_response = requests.get(search_url, params=search_params, timeout=10)
+
+        search_response = http_get(ESEARCH_URL, params=search_params, timeout=10)
         search_response.raise_for_status()
         search_data = search_response.json()
-        
+
         id_list = search_data.get("esearchresult", {}).get("idlist", [])
-        
+
         if not id_list:
             return [{"message": f"No PubMed articles found for '{query}'"}]
-        
-        fetch_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
-        fetch_params = {
-            "db": "pubmed",
-            "id": ",".join(id_list),
-            "retmode": "xml"
-        }
-        
-        fetch_response = requests.get(fetch_url, params=fetch_params, timeout=15)
-        fetch_response.raise_for_status()
-        
-        root = ET.fromstring(fetch_response.content)
-        articles = []
-        
-        for article in root.findall(".//PubmedArticle"):
-            title_elem = article.find(".//ArticleTitle")
-            abstract_elem = article.find(".//AbstractText")
-            pmid_elem = article.find(".//PMID")
-            
-            authors = []
-            for author in article.findall(".//Author")[:3]:
-                last_name = author.find("LastName")
-                fore_name = author.find("ForeName")
-                if last_name is not None:
-                    name = last_name.text
-                    if fore_name is not None:
-                        name = f"{fore_name.text} {name}"
-                    authors.append(name)
-            
-            pub_date = article.find(".//PubDate")
-            year = pub_date.find("Year").text if pub_date is not None and pub_date.find("Year") is not None else "N/A"
-            
-            abstract_text = abstract_elem.text if abstract_elem is not None else "No abstract available"
-            if len(abstract_text) > 500:
-                abstract_text = abstract_text[:500] + "..."
-            
-            articles.append({
-                "title": title_elem.text if title_elem is not None else "Unknown",
-                "authors": authors,
-                "abstract": abstract_text,
-                "year": year,
-                "pmid": pmid_elem.text if pmid_elem is not None else "N/A",
-                "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid_elem.text}/" if pmid_elem is not None else None
-            })
-        
-        return articles
+
+        # Articles seen by earlier searches need no efetch at all.
+        articles = {}
+        missing = []
+        for pmid in id_list:
+            article = result_cache.lookup("pubmed_article", (pmid,))
+            if article is result_cache.MISS:
+                missing.append(pmid)
+            else:
+                articles[pmid] = article
+        if missing:
+            for pmid, future in zip(missing, _efetch.submit_many(missing)):
+                articles[pmid] = wait(future)
+
+        return [articles[pmid] for pmid in id_list if articles.get(pmid) is not None]
     except Exception as e:
         return [{"error": f"PubMed search failed: {str(e)}"}]
@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from http_session import http_get
+from request_context import remaining_time, note_local_rejection
+
+# Client-side view of an API's rate limit, fed from its responses
+# (X-RateLimit-* headers, StackExchange's quota_remaining and backoff).
+# Calls are refused locally, or held until the window resets if that fits
+# in the caller's deadline, instead of being sent to earn a 403.
+RESERVE = int(os.environ.get("QUOTA_RESERVE", "1"))
+ETAG_ENTRIES = int(os.environ.get("QUOTA_ETAG_ENTRIES", "512"))
+
+
+class QuotaExhausted(Exception):
+    """Raised when a call would exceed an API's remaining quota."""
+
+
+class Quota:
+    """
+    Remaining calls, reset time and backoff for one API.
+    """
+
+    def __init__(self, name: str, reserve: int = RESERVE):
+        self.name = name
+        self.reserve = reserve
+        self.remaining = None
+        self.limit = None
+        self.reset_at = None
+        self.backoff_until = 0.0
+        self.sent = 0
+        self.skipped = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+
+    def _wait_time(self, now: float) -> float:
+        wait = max(0.0, self.backoff_until - now)
+        if self.remaining is not None and self.remaining <= self.reserve:
+            if self.reset_at is None or self.reset_at <= now:
+                # The window has rolled over; the next response will tell.
+                self.remaining = None
+            else:
+                wait = max(wait, self.reset_at - now)
+        return wait
+
+    def acquire(self) -> None:
+        """
+        Reserve one call, waiting for a reset or backoff when the caller's
+        deadline allows it; otherwise raise QuotaExhausted.
+        """
+        while True:
+            with self._lock:
+                now = time.time()
+                wait = self._wait_time(now)
+                if wait <= 0:
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    self.sent += 1
+                    return
+                budget = remaining_time()
+                if budget is None or wait > budget:
+                    self.skipped += 1
+                    note_local_rejection()
+                    raise QuotaExhausted(
+                        f"{self.name} rate limit reached, retry in {wait:.0f}s"
+                    )
+            time.sleep(wait)
+
+    def refund(self) -> None:
+        """
+        Give back a call that did not count against the limit (e.g. a 304).
+        """
+        with self._lock:
+            self.revalidated += 1
+            if self.remaining is not None:
+                self.remaining += 1
+
+    def update(self, remaining=None, limit=None, reset_at=None, backoff=None) -> None:
+        with self._lock:
+            if remaining is not None:
+                self.remaining = int(remaining)
+            if limit is not None:
+                self.limit = int(limit)
+            if reset_at is not None:
+                self.reset_at = float(reset_at)
+            if backoff:
+                self.backoff_until = max(self.backoff_until, time.time() + float(backoff))
+
+    def update_from_headers(self, headers) -> None:
+        """
+        Read GitHub-style X-RateLimit-* and Retry-After headers.
+        """
+        retry_after = headers.get("Retry-After")
+        self.update(
+            remaining=headers.get("X-RateLimit-Remaining"),
+            limit=headers.get("X-RateLimit-Limit"),
+            reset_at=headers.get("X-RateLimit-Reset"),
+            backoff=float(retry_after) if retry_after and retry_after.isdigit() else None,
+        )
+
+    def snapshot(self) -> dict:
+        now = time.time()
+        with self._lock:
+            return {
+                "remaining": self.remaining,
+                "limit": self.limit,
+                "reset_in": max(0.0, self.reset_at - now) if self.reset_at else None,
+                "backoff_in": max(0.0, self.backoff_until - now),
+                "sent": self.sent,
+                "skipped": self.skipped,
+                "revalidated": self.revalidated,
+            }
+
+
+_quotas = {}
+_quotas_lock = threading.Lock()
+# (url, params) -> (etag, decoded body) of the last 200 response.
+_etags = OrderedDict()
+_etags_lock = threading.Lock()
+
+
+def get_quota(name: str) -> Quota:
+    quota = _quotas.get(name)
+    if quota is None:
+        with _quotas_lock:
+            quota = _quotas.setdefault(name, Quota(name))
+    return quota
+
+
+def quota_snapshot() -> dict:
+    with _quotas_lock:
+        quotas = list(_quotas.values())
+    return {quota.name: quota.snapshot() for quota in quotas}
+
+
+def conditional_get(quota: Quota, url: str, params=None, headers=None, timeout: float = 10,
+                    on_fresh=None):
+    """
+    GET a JSON API under `quota`, revalidating the last response for the
+    same URL with If-None-Match. A 304 returns the stored body and does not
+    count against the quota. `on_fresh(data)` is called for a new 200 body
+    only, e.g. to read quota fields that a stored body would have stale.
+    Raises QuotaExhausted or requests' HTTPError.
+    """
+    key = (url, tuple(sorted((params or {}).items())))
+    with _etags_lock:
+        stored = _etags.get(key)
+        if stored is not None:
+            _etags.move_to_end(key)
+    headers = dict(headers or {})
+    if stored is not None:
+        headers["If-None-Match"] = stored[0]
+
+    quota.acquire()
+    response = http_get(url, params=params, headers=headers, timeout=timeout)
+    revalidated = response.status_code == 304 and stored is not None
+    if revalidated:
+        quota.refund()
+    quota.update_from_headers(response.headers)
+    if revalidated:
+        return stored[1]
+    if response.status_code in (403, 429) and quota.remaining == 0:
+        raise QuotaExhausted(f"{quota.name} rate limit reached")
+    response.raise_for_status()
+
+    data = response.json()
+    if on_fresh is not None:
+        on_fresh(data)
+    etag = response.headers.get("ETag")
+    if etag:
+        with _etags_lock:
+            _etags[key] = (etag, data)
+            _etags.move_to_end(key)
+            while len(_etags) > ETAG_ENTRIES:
+                _etags.popitem(last=False)
+    return data
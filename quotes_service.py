@@ -1,4 +1,4 @@
-import requests
+from http_session import http_get
 
 
 def search_quotes(query: str, limit: int = 5) -> list:
@@ -12,7 +12,7 @@ def search_quotes(query: str, limit: int = 5) -> list:
             "query": query,
             "limit": limit
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = http_get(url, params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -31,7 +31,7 @@ def search_quotes(query: str, limit: int = 5) -> list:
         
         return quotes if quotes else [{"message": "No quotes found"}]
     except Exception as e:
-        return get_random_quotes(limit)
+        return [{"error": f"Quotes search failed: {str(e)}"}]
 
 
 def get_random_quotes(limit: int = 3) -> list:
@@ -40,7 +40,7 @@ def get_random_quotes(limit: int = 3) -> list:
     """
     try:
         url = f"https://api.quotable.io/quotes/random?limit={limit}"
-        response = requests.get(url, timeout=10)
+        response = http_get(url, timeout=10)
         response.raise_for_status()
         
         data = response.json()
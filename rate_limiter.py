@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+
+from request_context import remaining_time, note_local_rejection, DeadlineExceeded
+
+# Requests per second and burst size per upstream host, following each
+# provider's usage policy. RATE_LIMITS overrides or adds entries, e.g.
+# "nominatim.openstreetmap.org=1:1,api.github.com=0.5:2". Hosts without an
+# entry are not throttled.
+HOST_LIMITS = {
+    "nominatim.openstreetmap.org": (1.0, 1),
+    "eutils.ncbi.nlm.nih.gov": (3.0, 3),
+    "export.arxiv.org": (1 / 3, 1),
+    "en.wikipedia.org": (20.0, 20),
+    "www.wikidata.org": (20.0, 20),
+}
+
+
+def _parse_limits(spec: str) -> dict:
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            host, rate = item.split("=", 1)
+            rate, _, burst = rate.partition(":")
+            limits[host.strip()] = (float(rate), int(burst or 1))
+    return limits
+
+
+HOST_LIMITS.update(_parse_limits(os.environ.get("RATE_LIMITS", "")))
+
+
+class RateLimited(DeadlineExceeded):
+    """Raised when waiting for a rate-limit slot would overrun the deadline."""
+
+
+class TokenBucket:
+    """
+    Token bucket whose callers queue in arrival order: each acquire reserves
+    the next free slot (the balance may go negative) and sleeps until it,
+    so no caller can be overtaken by later ones.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.waited = 0
+        self.rejected = 0
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping for it if needed. Raises RateLimited at once
+        if the wait would outlast the caller's deadline. Returns the wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            budget = remaining_time()
+            if budget is not None and wait > budget:
+                self.rejected += 1
+                note_local_rejection()
+                raise RateLimited(f"Rate limit wait of {wait:.1f}s exceeds the deadline")
+            self._tokens -= 1
+            self.granted += 1
+            if wait:
+                self.waited += 1
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "granted": self.granted,
+                "waited": self.waited,
+                "rejected": self.rejected,
+            }
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(host: str):
+    """
+    Return the process-wide bucket for a host, or None if it is not limited.
+    """
+    bucket = _buckets.get(host)
+    if bucket is None:
+        if host not in HOST_LIMITS:
+            return None
+        with _buckets_lock:
+            bucket = _buckets.get(host)
+            if bucket is None:
+                bucket = _buckets[host] = TokenBucket(*HOST_LIMITS[host])
+    return bucket
+
+
+def acquire(host: str) -> None:
+    """
+    Wait for the host's next request slot, if it has a limit.
+    """
+    bucket = get_bucket(host)
+    if bucket is not None:
+        bucket.acquire()
+
+
+def limiter_stats() -> dict:
+    with _buckets_lock:
+        buckets = dict(_buckets)
+    return {host: bucket.stats() for host, bucket in buckets.items()}
@@ -0,0 +1,131 @@
+import concurrent.futures
+import os
+import threading
+import time
+
+from request_context import remaining_time, DeadlineExceeded
+
+# Keys requested by concurrent sessions within WINDOW seconds of each other
+# are fetched with one upstream call. The first caller of a window waits
+# it out and runs the batch in its own thread; the others just wait.
+WINDOW = float(os.environ.get("BATCH_WINDOW_SECONDS", "0.02"))
+
+
+class RequestBatcher:
+    """
+    Collect single-key lookups into batched upstream calls.
+    `handler(keys)` receives a list of distinct keys and returns a dict
+    mapping each key to its result; keys it leaves out resolve to None.
+    """
+
+    def __init__(self, name: str, handler, max_batch: int = 50, window: float = WINDOW):
+        self.name = name
+        self._handler = handler
+        self._max_batch = max_batch
+        self._window = window
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._opened = None
+        self.batches = 0
+        self.keys = 0
+        self.coalesced = 0
+
+    def submit(self, key) -> concurrent.futures.Future:
+        """
+        Queue `key` for the next batch and return a future for its result.
+        """
+        return self.submit_many([key])[0]
+
+    def submit_many(self, keys) -> list:
+        """
+        Queue several keys at once; they all go out in the same batch.
+        """
+        with self._lock:
+            futures = []
+            for key in keys:
+                future = self._pending.get(key)
+                if future is None:
+                    future = self._pending[key] = concurrent.futures.Future()
+                    self.keys += 1
+                else:
+                    self.coalesced += 1
+                futures.append(future)
+            leader = self._opened is None
+            if leader:
+                self._opened = time.monotonic()
+            full = len(self._pending) >= self._max_batch
+        if leader and not full:
+            time.sleep(self._window)
+        if leader or full:
+            self._flush()
+        return futures
+
+    def get(self, key):
+        """
+        Blocking lookup of one key through the batcher.
+        """
+        return wait(self.submit(key))
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch = self._pending
+            self._pending = {}
+            self._opened = None
+        while batch:
+            keys = list(batch)[:self._max_batch]
+            futures = {key: batch.pop(key) for key in keys}
+            with self._lock:
+                self.batches += 1
+            try:
+                results = self._handler(keys)
+            except Exception as e:
+                for future in futures.values():
+                    future.set_exception(e)
+                continue
+            for key, future in futures.items():
+                future.set_result(results.get(key))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "keys": self.keys,
+                "coalesced": self.coalesced,
+                "keys_per_batch": self.keys / self.batches if self.batches else 0.0,
+            }
+
+
+def wait(future: concurrent.futures.Future):
+    """
+    Wait for a batched result, no longer than the caller's deadline.
+    """
+    timeout = remaining_time()
+    if timeout is not None and timeout <= 0:
+        raise DeadlineExceeded("Deadline exceeded while waiting for a batch")
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        raise DeadlineExceeded("Deadline exceeded while waiting for a batch") from None
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(name: str, handler, **options) -> RequestBatcher:
+    """
+    Return the process-wide batcher registered under `name`, creating it on first use.
+    """
+    batcher = _batchers.get(name)
+    if batcher is None:
+        with _batchers_lock:
+            batcher = _batchers.get(name)
+            if batcher is None:
+                batcher = _batchers[name] = RequestBatcher(name, handler, **options)
+    return batcher
+
+
+def batcher_stats() -> dict:
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+    return {batcher.name: batcher.stats() for batcher in batchers}
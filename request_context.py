@@ -0,0 +1,93 @@
+import contextvars
+import time
+from contextlib import contextmanager
+
+# Absolute time.monotonic() deadline for the work running in this context.
+# asyncio tasks and search_engine.run_blocking copy the context, so a budget
+# set around a source call follows it into the executor thread.
+_deadline = contextvars.ContextVar("deadline", default=None)
+# Name of the search source the current work is for, used for per-source
+# accounting of upstream traffic.
+_source = contextvars.ContextVar("source", default=None)
+# Mutable flag shared by a source call and the threads it runs in, set when
+# a call is refused locally (rate limit, quota) without reaching upstream.
+_rejection = contextvars.ContextVar("rejection", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a call would start after its deadline has passed."""
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """
+    Limit the enclosed work to `seconds`. Nested scopes never extend an
+    outer deadline.
+    """
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time():
+    """
+    Seconds left before the current deadline, or None if there is none.
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def cap_timeout(timeout: float) -> float:
+    """
+    Shrink a request timeout so it ends no later than the current deadline.
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("Deadline exceeded before request was sent")
+    return min(timeout, remaining)
+
+
+@contextmanager
+def source_scope(name: str):
+    """
+    Attribute the enclosed upstream requests to source `name`.
+    """
+    token = _source.set(name)
+    try:
+        yield
+    finally:
+        _source.reset(token)
+
+
+def current_source():
+    return _source.get()
+
+
+@contextmanager
+def rejection_scope():
+    """
+    Track whether the enclosed work was refused locally. Yields a dict
+    whose "rejected" entry becomes True after note_local_rejection().
+    """
+    holder = {"rejected": False}
+    token = _rejection.set(holder)
+    try:
+        yield holder
+    finally:
+        _rejection.reset(token)
+
+
+def note_local_rejection() -> None:
+    holder = _rejection.get()
+    if holder is not None:
+        holder["rejected"] = True
@@ -0,0 +1,324 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from disk_cache import get_disk_cache
+from single_flight import SingleFlight
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# How long each source's results stay fresh. Fast-changing data gets
+# minutes; reference data that almost never changes gets days.
+SOURCE_TTLS = {
+    "weather": 10 * MINUTE,
+    "air_quality": 15 * MINUTE,
+    "news": 10 * MINUTE,
+    "duckduckgo": 1 * HOUR,
+    "duckduckgo_instant": 6 * HOUR,
+    "github": 1 * HOUR,
+    "stackoverflow": 1 * HOUR,
+    "wikipedia": 1 * DAY,
+    "arxiv": 1 * DAY,
+    "pubmed": 1 * DAY,
+    "quotes": 1 * DAY,
+    "books": 3 * DAY,
+    "wikidata": 7 * DAY,
+    "country": 7 * DAY,
+    "dictionary": 30 * DAY,
+    "geocoding": 30 * DAY,
+    # Stages of the location pipeline, keyed by place text or coordinates.
+    "geocode_place": 30 * DAY,
+    "reverse_geocoding": 30 * DAY,
+    "weather_coords": 10 * MINUTE,
+    "air_quality_coords": 15 * MINUTE,
+    # Definitions per headword, and words the dictionary API does not know.
+    "dictionary_word": 30 * DAY,
+    "dictionary_miss": 7 * DAY,
+    # Parsed PubMed articles by PMID; shared by every search that finds them.
+    "pubmed_article": 7 * DAY,
+}
+DEFAULT_TTL = 1 * HOUR
+
+# Sources whose entries may still be served for this long after their TTL,
+# labelled with their age, while a background refresh fetches a fresh copy.
+STALE_TTLS = {
+    "weather": 1 * HOUR,
+    "air_quality": 2 * HOUR,
+    "news": 1 * HOUR,
+}
+
+# Inner caches a source's result is built from. Refreshing the source
+# re-reads them upstream; otherwise a refresh would re-serve the same,
+# equally old inner data under a new TTL.
+REFRESH_THROUGH = {
+    "weather": ("weather_coords",),
+    "air_quality": ("air_quality_coords",),
+}
+
+MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+MISS = object()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache keys: case-folded, whitespace collapsed.
+    """
+    return " ".join(query.casefold().split())
+
+
+def cache_key(source: str, args: tuple) -> str:
+    """
+    Build the cache key for a source call from its positional arguments.
+    """
+    parts = [normalize_query(a) if isinstance(a, str) else a for a in args]
+    return json.dumps([source, *parts], separators=(",", ":"), default=str)
+
+
+def hard_ttl(source: str) -> float:
+    """
+    How long an entry is kept: its TTL plus any stale-serving window.
+    """
+    return SOURCE_TTLS.get(source, DEFAULT_TTL) + STALE_TTLS.get(source, 0)
+
+
+def serialize(value) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def is_error_result(data) -> bool:
+    """
+    True for the {"error": ...} / [{"error": ...}] shapes services return on failure.
+    """
+    if isinstance(data, dict):
+        return "error" in data
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        return "error" in data[0]
+    return False
+
+
+class ResultCache:
+    """
+    Thread-safe, size-bounded LRU of serialized results with per-entry TTLs.
+    Values are stored as JSON so memory use is measured exactly and callers
+    always get their own copy back.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        """
+        Return the cached value for `key`, or MISS.
+        """
+        entry = self.get_entry(key)
+        return entry if entry is MISS else entry[0]
+
+    def get_entry(self, key: str):
+        """
+        Return (value, expires_at) for `key`, or MISS.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return MISS
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(payload), expires_at
+
+    def peek_expiry(self, key: str):
+        """
+        Expiry time of a live entry, or None; does not count as a lookup.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            return None
+        return entry[0]
+
+    def put(self, key: str, value, ttl: float) -> None:
+        self.put_payload(key, serialize(value), time.time() + ttl)
+
+    def put_payload(self, key: str, payload: str, expires_at: float) -> None:
+        """
+        Store an already-serialized value, e.g. one read from the disk tier.
+        """
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, payload)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache = ResultCache()
+
+
+def get_cache() -> ResultCache:
+    return _cache
+
+
+def lookup_entry(source: str, args: tuple, memory: bool = True, disk: bool = True):
+    """
+    Return (value, age_seconds, stale) for `source` called with `args`, or
+    MISS. Stale entries are past the source's TTL but inside STALE_TTLS.
+    Checks memory first, then the shared on-disk tier; an event loop should
+    pass disk=False and read the disk tier (memory=False) in a worker.
+    """
+    key = cache_key(source, args)
+    entry = _cache.get_entry(key) if memory else MISS
+    if entry is MISS:
+        disk_cache = get_disk_cache() if disk else None
+        row = disk_cache.get(key) if disk_cache is not None else None
+        if row is None:
+            return MISS
+        payload, expires_at = row
+        _cache.put_payload(key, payload, expires_at)
+        entry = json.loads(payload), expires_at
+    value, expires_at = entry
+    # Entries carry only their hard expiry; their age follows from the TTLs.
+    age = max(0.0, time.time() - (expires_at - hard_ttl(source)))
+    return value, age, age > SOURCE_TTLS.get(source, DEFAULT_TTL)
+
+
+def entry_age(source: str, args: tuple):
+    """
+    Age in seconds of the cached entry for a call, or None if there is
+    none. Used by background jobs; it does not affect hit statistics.
+    """
+    key = cache_key(source, args)
+    expires_at = _cache.peek_expiry(key)
+    if expires_at is None:
+        disk = get_disk_cache()
+        expires_at = disk.peek_expiry(key) if disk is not None else None
+    if expires_at is None:
+        return None
+    return max(0.0, time.time() - (expires_at - hard_ttl(source)))
+
+
+def lookup(source: str, args: tuple):
+    """
+    Return the fresh cached result of `source` called with `args`, or MISS.
+    """
+    entry = lookup_entry(source, args)
+    if entry is MISS or entry[2]:
+        return MISS
+    return entry[0]
+
+
+def with_age(value, age: float):
+    """
+    Label a cached result with its age in seconds ("cache_age"), on the
+    result itself or on each item of a list result.
+    """
+    if isinstance(value, dict):
+        value["cache_age"] = int(age)
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                item["cache_age"] = int(age)
+    return value
+
+
+def store(source: str, args: tuple, value) -> None:
+    """
+    Cache a successful result using the source's TTL. Errors are not cached.
+    """
+    if is_error_result(value):
+        return
+    key = cache_key(source, args)
+    payload = serialize(value)
+    expires_at = time.time() + hard_ttl(source)
+    _cache.put_payload(key, payload, expires_at)
+    disk = get_disk_cache()
+    if disk is not None:
+        disk.put(key, source, payload, expires_at)
+
+
+_flights = SingleFlight()
+# Cached functions whose lookups the current context skips (see refresh_scope).
+_bypass = contextvars.ContextVar("cache_bypass", default=frozenset())
+
+
+@contextmanager
+def refresh_scope(source: str):
+    """
+    Refresh `source`: the enclosed work skips lookups in its
+    REFRESH_THROUGH caches and stores what it fetches.
+    """
+    token = _bypass.set(_bypass.get() | frozenset(REFRESH_THROUGH.get(source, ())))
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cached(source: str):
+    """
+    Decorator adding the result cache to a blocking service function.
+    Concurrent misses for the same key share a single upstream call.
+    """
+    def decorator(func):
+        def fetch(*args):
+            value = func(*args)
+            store(source, args, value)
+            return value
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            value = MISS if source in _bypass.get() else lookup(source, args)
+            if value is not MISS:
+                return value
+            return _flights.do(cache_key(source, args), fetch, *args)
+        return wrapper
+    return decorator
@@ -0,0 +1,293 @@
+def _format_duckduckgo_instant(instant) -> list:
+    output = []
+    if isinstance(instant, dict) and instant.get("answer"):
+        output.append(f"### 💡 Quick Answer\n{instant['answer']}\n")
+    return output
+
+
+def _format_wikipedia(wiki) -> list:
+    output = []
+    if isinstance(wiki, dict) and wiki.get("exists"):
+        output.append(f"### 📚 Wikipedia: {wiki.get('title', 'N/A')}")
+        output.append(f"{wiki.get('summary', 'No summary')[:500]}...")
+        output.append(f"[Read more]({wiki.get('url', '')})\n")
+    return output
+
+
+def _format_duckduckgo(ddg) -> list:
+    output = []
+    if isinstance(ddg, list) and ddg and "error" not in ddg[0]:
+        output.append("### 🌐 Web Results")
+        for item in ddg[:3]:
+            output.append(f"- **{item.get('title', 'N/A')}**")
+            output.append(f"  {item.get('body', '')[:150]}...")
+            if item.get('url'):
+                output.append(f"  [Link]({item.get('url')})")
+        output.append("")
+    return output
+
+
+def _format_arxiv(arxiv_data) -> list:
+    output = []
+    if isinstance(arxiv_data, list) and arxiv_data and "error" not in arxiv_data[0]:
+        output.append("### 🔬 Scientific Papers (ArXiv)")
+        for paper in arxiv_data[:3]:
+            authors = ", ".join(paper.get("authors", [])[:2])
+            output.append(f"- **{paper.get('title', 'N/A')}**")
+            output.append(f"  Authors: {authors} | Published: {paper.get('published', 'N/A')}")
+            output.append(f"  {paper.get('summary', '')[:200]}...")
+            if paper.get('url'):
+                output.append(f"  [View Paper]({paper.get('url')})")
+        output.append("")
+    return output
+
+
+def _format_pubmed(pubmed_data) -> list:
+    output = []
+    if isinstance(pubmed_data, list) and pubmed_data and "error" not in pubmed_data[0] and "message" not in pubmed_data[0]:
+        output.append("### 🏥 Medical Research (PubMed)")
+        for article in pubmed_data[:3]:
+            authors = ", ".join(article.get("authors", [])[:2])
+            output.append(f"- **{article.get('title', 'N/A')}**")
+            output.append(f"  Authors: {authors} | Year: {article.get('year', 'N/A')}")
+            output.append(f"  {article.get('abstract', '')[:200]}...")
+            if article.get('url'):
+                output.append(f"  [View Article]({article.get('url')})")
+        output.append("")
+    return output
+
+
+def _format_books(books_data) -> list:
+    output = []
+    if isinstance(books_data, list) and books_data and "error" not in books_data[0]:
+        output.append("### 📖 Books (OpenLibrary)")
+        for book in books_data[:3]:
+            authors = ", ".join(book.get("authors", [])[:2])
+            output.append(f"- **{book.get('title', 'N/A')}**")
+            output.append(f"  Authors: {authors} | First Published: {book.get('first_publish_year', 'N/A')}")
+            if book.get('url'):
+                output.append(f"  [View Book]({book.get('url')})")
+        output.append("")
+    return output
+
+
+def _format_wikidata(wikidata) -> list:
+    output = []
+    if isinstance(wikidata, list) and wikidata and "error" not in wikidata[0]:
+        output.append("### 🗃️ Wikidata Entities")
+        for entity in wikidata[:3]:
+            output.append(f"- **{entity.get('label', 'N/A')}**: {entity.get('description', 'No description')}")
+            if entity.get('url'):
+                output.append(f"  [View]({entity.get('url')})")
+        output.append("")
+    return output
+
+
+def _format_weather(weather) -> list:
+    output = []
+    if isinstance(weather, dict) and "error" not in weather:
+        output.append("### 🌤️ Weather")
+        output.append(f"- Location: {weather.get('location', 'N/A')}")
+        output.append(f"- Temperature: {weather.get('temperature_c', 'N/A')}°C / {weather.get('temperature_f', 'N/A')}°F")
+        output.append(f"- Condition: {weather.get('condition', 'N/A')}")
+        output.append(f"- Humidity: {weather.get('humidity', 'N/A')}%")
+        output.append("")
+    return output
+
+
+def _format_air_quality(aq) -> list:
+    output = []
+    if isinstance(aq, dict) and "error" not in aq and aq.get("data"):
+        output.append("### 🌬️ Air Quality")
+        output.append(f"- City: {aq.get('city', 'N/A')}")
+        for loc in aq.get("data", [])[:2]:
+            output.append(f"- Location: {loc.get('location', 'N/A')}")
+            for m in loc.get("measurements", [])[:3]:
+                output.append(f"  - {m.get('parameter', 'N/A')}: {m.get('value', 'N/A')} {m.get('unit', '')}")
+        output.append("")
+    return output
+
+
+def _format_geocoding(geo) -> list:
+    output = []
+    if isinstance(geo, dict) and "error" not in geo:
+        output.append("### 📍 Location Info")
+        output.append(f"- {geo.get('display_name', 'N/A')}")
+        output.append(f"- Coordinates: {geo.get('latitude', 'N/A')}, {geo.get('longitude', 'N/A')}")
+        if geo.get('osm_url'):
+            output.append(f"- [View on Map]({geo.get('osm_url')})")
+        output.append("")
+    return output
+
+
+def _format_news(news_data) -> list:
+    output = []
+    if isinstance(news_data, list) and news_data and "error" not in news_data[0] and "message" not in news_data[0]:
+        output.append("### 📰 News")
+        for article in news_data[:3]:
+            output.append(f"- **{article.get('title', 'N/A')}**")
+            if article.get('source'):
+                output.append(f"  Source: {article.get('source')} | {article.get('date', '')}")
+            output.append(f"  {article.get('body', '')[:150]}...")
+            if article.get('url'):
+                output.append(f"  [Read Article]({article.get('url')})")
+        output.append("")
+    return output
+
+
+def _format_dictionary(dictionary) -> list:
+    output = []
+    if isinstance(dictionary, dict) and "error" not in dictionary and "message" not in dictionary:
+        output.append(f"### 📖 Dictionary: {dictionary.get('word', 'N/A')}")
+        phonetics = dictionary.get('phonetics', [])
+        if phonetics:
+            output.append(f"*Pronunciation: {', '.join(phonetics)}*")
+        for meaning in dictionary.get('meanings', [])[:2]:
+            output.append(f"**{meaning.get('part_of_speech', '')}**")
+            for defn in meaning.get('definitions', [])[:2]:
+                output.append(f"- {defn.get('definition', '')}")
+                if defn.get('example'):
+                    output.append(f"  *Example: \"{defn.get('example')}\"*")
+        output.append("")
+    return output
+
+
+def _format_country(country) -> list:
+    output = []
+    if isinstance(country, dict) and "error" not in country and "message" not in country:
+        output.append(f"### 🌍 Country: {country.get('name', 'N/A')} {country.get('flag_emoji', '')}")
+        output.append(f"- **Official Name**: {country.get('official_name', 'N/A')}")
+        output.append(f"- **Capital**: {country.get('capital', 'N/A')}")
+        output.append(f"- **Region**: {country.get('region', 'N/A')} / {country.get('subregion', 'N/A')}")
+        output.append(f"- **Population**: {country.get('population', 'N/A'):,}" if isinstance(country.get('population'), int) else f"- **Population**: {country.get('population', 'N/A')}")
+        languages = country.get('languages', [])
+        if languages:
+            output.append(f"- **Languages**: {', '.join(languages[:3])}")
+        currencies = country.get('currencies', [])
+        if currencies:
+            output.append(f"- **Currencies**: {', '.join(currencies[:2])}")
+        if country.get('map_url'):
+            output.append(f"- [View on Map]({country.get('map_url')})")
+        output.append("")
+    return output
+
+
+def _format_quotes(quotes_data) -> list:
+    output = []
+    if isinstance(quotes_data, list) and quotes_data and "error" not in quotes_data[0] and "message" not in quotes_data[0]:
+        output.append("### 💬 Quotes")
+        for quote in quotes_data[:3]:
+            output.append(f"> \"{quote.get('content', '')}\"")
+            output.append(f"> — *{quote.get('author', 'Unknown')}*")
+            output.append("")
+    return output
+
+
+def _format_github(github_data) -> list:
+    output = []
+    if isinstance(github_data, list) and github_data and "error" not in github_data[0] and "message" not in github_data[0]:
+        output.append("### 💻 GitHub Repositories")
+        for repo in github_data[:3]:
+            output.append(f"- **{repo.get('name', 'N/A')}** ⭐ {repo.get('stars', 0):,}")
+            output.append(f"  {repo.get('description', 'No description')[:100]}...")
+            output.append(f"  Language: {repo.get('language', 'N/A')} | Forks: {repo.get('forks', 0):,}")
+            if repo.get('url'):
+                output.append(f"  [View Repository]({repo.get('url')})")
+        output.append("")
+    return output
+
+
+def _format_stackoverflow(so_data) -> list:
+    output = []
+    if isinstance(so_data, list) and so_data and "error" not in so_data[0] and "message" not in so_data[0]:
+        output.append("### 🔧 Stack Overflow")
+        for q in so_data[:3]:
+            answered_emoji = "✅" if q.get('is_answered') else "❓"
+            output.append(f"- {answered_emoji} **{q.get('title', 'N/A')}**")
+            output.append(f"  Score: {q.get('score', 0)} | Answers: {q.get('answer_count', 0)} | Views: {q.get('view_count', 0):,}")
+            tags = q.get('tags', [])[:3]
+            if tags:
+                output.append(f"  Tags: {', '.join(tags)}")
+            if q.get('url'):
+                output.append(f"  [View Question]({q.get('url')})")
+        output.append("")
+    return output
+
+# Sections render in this order, whatever order the sources finish in.
+SECTION_FORMATTERS = {
+    "duckduckgo_instant": _format_duckduckgo_instant,
+    "wikipedia": _format_wikipedia,
+    "duckduckgo": _format_duckduckgo,
+    "arxiv": _format_arxiv,
+    "pubmed": _format_pubmed,
+    "books": _format_books,
+    "wikidata": _format_wikidata,
+    "weather": _format_weather,
+    "air_quality": _format_air_quality,
+    "geocoding": _format_geocoding,
+    "news": _format_news,
+    "dictionary": _format_dictionary,
+    "country": _format_country,
+    "quotes": _format_quotes,
+    "github": _format_github,
+    "stackoverflow": _format_stackoverflow,
+}
+
+SECTION_LABELS = {
+    "duckduckgo_instant": "Quick Answer",
+    "wikipedia": "Wikipedia",
+    "duckduckgo": "Web Results",
+    "arxiv": "Scientific Papers (ArXiv)",
+    "pubmed": "Medical Research (PubMed)",
+    "books": "Books (OpenLibrary)",
+    "wikidata": "Wikidata Entities",
+    "weather": "Weather",
+    "air_quality": "Air Quality",
+    "geocoding": "Location Info",
+    "news": "News",
+    "dictionary": "Dictionary",
+    "country": "Country",
+    "quotes": "Quotes",
+    "github": "GitHub Repositories",
+    "stackoverflow": "Stack Overflow",
+}
+
+
+def _cache_age(data):
+    if isinstance(data, list) and data and isinstance(data[0], dict):
+        data = data[0]
+    return data.get("cache_age") if isinstance(data, dict) else None
+
+
+def _render(name: str, data) -> list:
+    """
+    Run a section's formatter, noting under its heading when the data came
+    from the cache more than a minute ago.
+    """
+    output = SECTION_FORMATTERS[name](data)
+    age = _cache_age(data)
+    if output and age is not None and age >= 60:
+        minutes = age // 60
+        when = f"{minutes} min" if minutes < 60 else f"{minutes // 60} h {minutes % 60} min"
+        output.insert(1, f"*🕒 Updated {when} ago*")
+    return output
+
+
+def format_section(name: str, data) -> str:
+    """
+    Format a single source's results; empty string if there is nothing to show.
+    """
+    if name not in SECTION_FORMATTERS:
+        return ""
+    return "\n".join(_render(name, data))
+
+
+def format_results(query: str, results: dict) -> str:
+    """Format all search results into a readable response."""
+    output = [f"## Search Results for: *{query}*\n"]
+    
+    for name in SECTION_FORMATTERS:
+        if name in results:
+            output.extend(_render(name, results[name]))
+    
+    return "\n".join(output)
@@ -0,0 +1,113 @@
+import email.utils
+import os
+import random
+import threading
+import time
+
+from request_context import remaining_time
+
+# Transient failures (connection resets, timeouts, 429 and 5xx gateway
+# errors) are retried with full-jitter exponential backoff, honouring
+# Retry-After. Each source may only retry a fraction of its calls
+# (BUDGET_RATIO, with a small burst), so an outage cannot turn into a retry
+# storm, and a retry is only made if it can still finish before the
+# caller's deadline.
+BUDGET_RATIO = float(os.environ.get("RETRY_BUDGET_RATIO", "0.1"))
+BUDGET_BURST = 5.0
+INITIAL_BUDGET = 1.0
+# A retry needs at least this much of the deadline left after its backoff.
+MIN_ATTEMPT_SECONDS = 0.3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    How one source retries. Only idempotent methods are ever retried.
+    """
+
+    def __init__(self, max_attempts: int = 2, base_delay: float = 0.1, max_delay: float = 1.0,
+                 statuses=RETRY_STATUSES, methods=("GET", "HEAD")):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(methods)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+DEFAULT_POLICY = RetryPolicy()
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+# Per-source overrides. GitHub and StackExchange are paced by
+# quota_scheduler, and a retry there would only spend quota.
+SOURCE_POLICIES = {
+    "github": NO_RETRY,
+    "stackoverflow": NO_RETRY,
+    "geocoding": RetryPolicy(max_attempts=2, base_delay=0.5, max_delay=1.0),
+    "pubmed": RetryPolicy(max_attempts=3, base_delay=0.2, max_delay=1.0),
+}
+
+_budgets = {}
+_stats = {"retries": 0, "budget_denied": 0, "deadline_denied": 0}
+_lock = threading.Lock()
+
+
+def policy_for(source) -> RetryPolicy:
+    return SOURCE_POLICIES.get(source, DEFAULT_POLICY)
+
+
+def record_call(source) -> None:
+    """
+    Earn retry budget for a first attempt.
+    """
+    with _lock:
+        _budgets[source] = min(BUDGET_BURST, _budgets.get(source, INITIAL_BUDGET) + BUDGET_RATIO)
+
+
+def retry_after(response) -> float:
+    """
+    Seconds asked for by a Retry-After header (delta or HTTP date), or None.
+    """
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def should_retry(source, policy: RetryPolicy, method: str, attempt: int, response=None):
+    """
+    Delay before retry number `attempt` (1-based), or None to give up.
+    `response` is the failed response, or None after a connection error.
+    """
+    if method.upper() not in policy.methods or attempt >= policy.max_attempts:
+        return None
+    if response is not None and response.status_code not in policy.statuses:
+        return None
+    delay = retry_after(response)
+    if delay is None:
+        delay = policy.backoff(attempt)
+    budget = remaining_time()
+    with _lock:
+        if budget is not None and delay + MIN_ATTEMPT_SECONDS > budget:
+            _stats["deadline_denied"] += 1
+            return None
+        tokens = _budgets.get(source, INITIAL_BUDGET)
+        if tokens < 1.0:
+            _stats["budget_denied"] += 1
+            return None
+        _budgets[source] = tokens - 1.0
+        _stats["retries"] += 1
+    return delay
+
+
+def retry_stats() -> dict:
+    with _lock:
+        return {**_stats, "budgets": dict(_budgets)}
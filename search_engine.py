@@ -0,0 +1,584 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import os
+import queue
+import threading
+
+from arxiv_service import search_arxiv
+from duckduckgo_service import search_duckduckgo, get_instant_answer, search_news
+from wikipedia_service import search_wikipedia
+from wikidata_service import search_wikidata
+from openlibrary_service import search_books
+from pubmed_service import search_pubmed
+from countries_service import search_country
+from quotes_service import search_quotes
+from github_service import search_github_repos
+from stackexchange_service import search_stackoverflow
+from location_pipeline import locate, weather_for_query, air_quality_for_query
+from dictionary_lookup import define_query
+from request_context import deadline_scope, source_scope, rejection_scope
+import result_cache
+import disk_cache
+from single_flight import SingleFlight
+from circuit_breaker import get_breaker
+import latency_tracker
+import semantic_cache
+from ai_service import classify_query, fallback_classify
+from source_router import plan_sources, ALWAYS_ON
+
+# Blocking work runs on two small, long-lived executors shared by every
+# session: one for the requests-based services (sized like the HTTP pool)
+# and a smaller one for third-party clients (arxiv, ddgs)
+# so a slow library cannot starve the plain HTTP sources. The query
+# classifier's model calls get their own pool: a call abandoned after
+# CLASSIFY_BUDGET keeps its worker until the model answers.
+IO_WORKERS = int(os.environ.get("SEARCH_IO_WORKERS", "32"))
+CLIENT_WORKERS = int(os.environ.get("SEARCH_CLIENT_WORKERS", "8"))
+CLASSIFIER_WORKERS = int(os.environ.get("SEARCH_CLASSIFIER_WORKERS", "4"))
+
+
+def _parse_budgets(spec: str) -> dict:
+    budgets = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, seconds = item.split("=", 1)
+            budgets[name.strip()] = float(seconds)
+    return budgets
+
+
+# End-to-end latency budget for one search, and tighter per-source budgets
+# for upstreams that are slow or flaky. SEARCH_SOURCE_BUDGETS overrides
+# entries, e.g. "pubmed=2,quotes=0.8".
+SEARCH_BUDGET = float(os.environ.get("SEARCH_BUDGET_SECONDS", "2.5"))
+SOURCE_BUDGETS = {
+    "quotes": 1.5,
+    "air_quality": 1.5,
+    "dictionary": 1.5,
+    "country": 1.5,
+}
+SOURCE_BUDGETS.update(_parse_budgets(os.environ.get("SEARCH_SOURCE_BUDGETS", "")))
+
+# Stale results are served at once and refreshed in the background, at
+# most REFRESH_CONCURRENCY at a time, each within REFRESH_BUDGET seconds.
+REFRESH_CONCURRENCY = int(os.environ.get("SWR_REFRESH_CONCURRENCY", "4"))
+REFRESH_BUDGET = float(os.environ.get("SWR_REFRESH_BUDGET_SECONDS", "10"))
+
+_loop = None
+_io_executor = None
+_client_executor = None
+_classifier_executor = None
+_engine_lock = threading.Lock()
+
+
+def _ensure_executors() -> None:
+    global _io_executor, _client_executor, _classifier_executor
+    if _io_executor is None:
+        with _engine_lock:
+            if _io_executor is None:
+                _classifier_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=CLASSIFIER_WORKERS, thread_name_prefix="search-classify"
+                )
+                _client_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=CLIENT_WORKERS, thread_name_prefix="search-client"
+                )
+                _io_executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=IO_WORKERS, thread_name_prefix="search-io"
+                )
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the engine's event loop, starting it in a daemon thread on first use.
+    """
+    global _loop
+    _ensure_executors()
+    if _loop is None:
+        with _engine_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                loop.set_default_executor(_io_executor)
+                thread = threading.Thread(
+                    target=loop.run_forever, name="search-engine-loop", daemon=True
+                )
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+async def run_blocking(func, *args, client: bool = False, **kwargs):
+    """
+    Run a blocking callable on the engine's bounded executors.
+    The caller's context variables are carried into the worker thread.
+    """
+    _ensure_executors()
+    loop = asyncio.get_running_loop()
+    executor = _client_executor if client else _io_executor
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(executor, call)
+
+
+def make_async(func, client: bool = False):
+    """
+    Build an async variant of a blocking service function.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run_blocking(func, *args, client=client, **kwargs)
+
+    wrapper.__name__ = f"{func.__name__}_async"
+    wrapper.__qualname__ = wrapper.__name__
+    return wrapper
+
+
+search_arxiv_async = make_async(search_arxiv, client=True)
+search_duckduckgo_async = make_async(search_duckduckgo, client=True)
+get_instant_answer_async = make_async(get_instant_answer, client=True)
+search_news_async = make_async(search_news, client=True)
+search_wikipedia_async = make_async(search_wikipedia)
+weather_for_query_async = make_async(weather_for_query)
+air_quality_for_query_async = make_async(air_quality_for_query)
+search_wikidata_async = make_async(search_wikidata)
+search_books_async = make_async(search_books)
+search_pubmed_async = make_async(search_pubmed)
+locate_async = make_async(locate)
+define_query_async = make_async(define_query)
+search_country_async = make_async(search_country)
+search_quotes_async = make_async(search_quotes)
+search_github_repos_async = make_async(search_github_repos)
+search_stackoverflow_async = make_async(search_stackoverflow)
+
+
+# Source name -> (async function, builder for its positional arguments).
+SOURCES = {
+    "arxiv": (search_arxiv_async, lambda q: (q, 3)),
+    "duckduckgo": (search_duckduckgo_async, lambda q: (q, 5)),
+    "duckduckgo_instant": (get_instant_answer_async, lambda q: (q,)),
+    "news": (search_news_async, lambda q: (q, 3)),
+    "wikipedia": (search_wikipedia_async, lambda q: (q,)),
+    # Location sources share one cached geocode of the place in the query.
+    "weather": (weather_for_query_async, lambda q: (q,)),
+    "air_quality": (air_quality_for_query_async, lambda q: (q,)),
+    "wikidata": (search_wikidata_async, lambda q: (q, 3)),
+    "books": (search_books_async, lambda q: (q, 5)),
+    "pubmed": (search_pubmed_async, lambda q: (q, 3)),
+    "geocoding": (locate_async, lambda q: (q,)),
+    "dictionary": (define_query_async, lambda q: (q,)),
+    "country": (search_country_async, lambda q: (q,)),
+    "quotes": (search_quotes_async, lambda q: (q, 3)),
+    "github": (search_github_repos_async, lambda q: (q, 3)),
+    "stackoverflow": (search_stackoverflow_async, lambda q: (q, 3)),
+}
+
+
+def _timed_out(budget: float) -> dict:
+    return {"error": f"Timed out after {budget:.1f}s", "timed_out": True}
+
+
+# Concurrent identical source calls from any session share one upstream call.
+flights = SingleFlight()
+
+
+def _unavailable(name: str) -> dict:
+    return {"error": f"Source '{name}' is temporarily unavailable", "unavailable": True}
+
+
+async def _hedged(name: str, func, args: tuple):
+    """
+    Run func(*args); if it is still running at the source's p95 latency and
+    the host has hedge budget left, race a duplicate and keep the first
+    successful answer. The loser is cancelled.
+    """
+    primary = asyncio.ensure_future(func(*args))
+    delay = latency_tracker.hedge_delay(name)
+    if delay is None:
+        return await primary
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not latency_tracker.try_hedge(name):
+        return await primary
+
+    hedge = asyncio.ensure_future(func(*args))
+    pending = {primary, hedge}
+    try:
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and not result_cache.is_error_result(task.result()):
+                    if task is hedge:
+                        latency_tracker.record_hedge_win()
+                    return task.result()
+            if not pending:
+                # Both failed; report the primary's outcome.
+                return primary.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _rate_limited(data) -> bool:
+    if isinstance(data, list) and data:
+        data = data[0]
+    return isinstance(data, dict) and bool(data.get("rate_limited"))
+
+
+async def _fetch(name: str, args: tuple, budget: float):
+    func = SOURCES[name][0]
+    breaker = get_breaker(name)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    # The deadline caps every HTTP timeout inside the call, so abandoned
+    # work releases its executor thread once the budget is spent.
+    # Calls refused locally (rate limit, quota) say nothing about the
+    # upstream's health or speed, so they are kept out of both statistics.
+    with deadline_scope(budget), source_scope(name), rejection_scope() as rejection:
+        try:
+            data = await _hedged(name, func, args)
+        except Exception:
+            if not rejection["rejected"]:
+                breaker.record(False, loop.time() - started)
+            raise
+    elapsed = loop.time() - started
+    failed = result_cache.is_error_result(data)
+    if not (failed and (rejection["rejected"] or _rate_limited(data))):
+        latency_tracker.record_latency(name, elapsed)
+        breaker.record(not failed, elapsed)
+    result_cache.store(name, args, data)
+    return data
+
+
+# Background refreshes: keys being refreshed, tasks kept alive until done,
+# and the semaphore bounding them (created on the engine loop).
+_refreshing = set()
+_refresh_tasks = set()
+_refresh_slots = None
+
+
+async def _refresh(name: str, args: tuple, key: str) -> bool:
+    """
+    Refetch one entry; True if a fresh result was stored.
+    """
+    global _refresh_slots
+    if _refresh_slots is None:
+        _refresh_slots = asyncio.Semaphore(REFRESH_CONCURRENCY)
+    try:
+        async with _refresh_slots:
+            if not get_breaker(name).allow():
+                return False
+            with result_cache.refresh_scope(name):
+                data = await flights.do_async(key, _fetch, name, args, REFRESH_BUDGET)
+            return not result_cache.is_error_result(data)
+    except Exception:
+        return False
+    finally:
+        _refreshing.discard(key)
+
+
+def _revalidate(name: str, args: tuple) -> None:
+    """
+    Start a background refresh of a stale entry, unless one is running.
+    """
+    key = result_cache.cache_key(name, args)
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    task = asyncio.ensure_future(_refresh(name, args, key))
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _prefetch(name: str, args: tuple, key: str):
+    if key in _refreshing:
+        return None
+    _refreshing.add(key)
+    return await _refresh(name, args, key)
+
+
+def prefetch(name: str, query: str) -> concurrent.futures.Future:
+    """
+    Refresh one source's cached result for `query` in the background,
+    e.g. ahead of expiry for a popular query. The future's result is True
+    or False for success, or None if a refresh was already running.
+    """
+    args = SOURCES[name][1](query)
+    key = result_cache.cache_key(name, args)
+    return asyncio.run_coroutine_threadsafe(_prefetch(name, args, key), get_loop())
+
+
+def _cached_entry(name: str, args: tuple, neighbors: list, memory: bool, disk: bool):
+    """
+    The cached entry for this call or, failing that, a fresh cached result
+    of a near-duplicate past query; MISS if neither is cached.
+    """
+    entry = result_cache.lookup_entry(name, args, memory=memory, disk=disk)
+    if entry is not result_cache.MISS:
+        return entry
+    for other in semantic_cache.candidates(name, neighbors):
+        entry = result_cache.lookup_entry(name, SOURCES[name][1](other), memory=memory, disk=disk)
+        if entry is not result_cache.MISS and not entry[2]:
+            semantic_cache.record_hit(name)
+            return entry
+    return result_cache.MISS
+
+
+async def _lookup_cached(name: str, args: tuple, neighbors: list):
+    """
+    Check the memory tier on the loop; read the disk tier, which can be
+    slow, on the IO executor so it never stalls other sources.
+    """
+    entry = _cached_entry(name, args, neighbors, memory=True, disk=False)
+    if entry is result_cache.MISS and disk_cache.ENABLED:
+        entry = await run_blocking(_cached_entry, name, args, neighbors, memory=False, disk=True)
+    return entry
+
+
+def _similar_queries(query: str) -> list:
+    """
+    Past queries close to this one (one vectorized pass), then remember it.
+    """
+    neighbors = semantic_cache.neighbors(query)
+    semantic_cache.remember(query)
+    return neighbors
+
+
+async def _safe_search(name: str, query: str, budget: float, neighbors: list = ()):
+    args = SOURCES[name][1](query)
+    entry = await _lookup_cached(name, args, neighbors)
+    if entry is not result_cache.MISS and entry[2]:
+        _revalidate(name, args)
+    if entry is not result_cache.MISS:
+        value, age, _ = entry
+        if name in result_cache.STALE_TTLS:
+            return result_cache.with_age(value, age)
+        return value
+    # Sources that keep failing are skipped instantly instead of costing
+    # their full timeout on every query.
+    if not get_breaker(name).allow():
+        return _unavailable(name)
+    # Time out at the source's observed p99 (with margin) rather than its
+    # full budget once enough calls have been seen.
+    budget = latency_tracker.adaptive_timeout(name, budget)
+    key = result_cache.cache_key(name, args)
+    try:
+        return await asyncio.wait_for(
+            flights.do_async(key, _fetch, name, args, budget), timeout=budget
+        )
+    except asyncio.TimeoutError:
+        return _timed_out(budget)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+async def stream_sources_async(query: str, sources=None, budget: float = None,
+                               source_budgets: dict = None):
+    """
+    Yield (source, result) pairs in order of arrival. When the budget runs
+    out, outstanding sources are cancelled and yielded as timed out.
+    """
+    budget = SEARCH_BUDGET if budget is None else budget
+    source_budgets = {**SOURCE_BUDGETS, **(source_budgets or {})}
+    names = list(sources) if sources is not None else list(SOURCES)
+    neighbors = _similar_queries(query)
+    pending = {
+        asyncio.create_task(
+            _safe_search(name, query, min(budget, source_budgets.get(name, budget)), neighbors)
+        ): name
+        for name in names
+    }
+    loop = asyncio.get_running_loop()
+    end = loop.time() + budget
+    try:
+        while pending:
+            remaining = end - loop.time()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield pending.pop(task), task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+    for name in pending.values():
+        yield name, _timed_out(budget)
+
+
+async def search_all_sources_async(query: str, sources=None, budget: float = None,
+                                   source_budgets: dict = None) -> dict:
+    """
+    Search the given sources (default: all) concurrently on the engine loop.
+    Returns whatever has arrived when the budget runs out; late sources are
+    cancelled and reported as timed out.
+    """
+    names = list(sources) if sources is not None else list(SOURCES)
+    arrived = {}
+    async for name, data in stream_sources_async(query, names, budget, source_budgets):
+        arrived[name] = data
+    return {name: arrived[name] for name in names}
+
+
+def search_all_sources(query: str, sources=None, budget: float = None,
+                       source_budgets: dict = None) -> dict:
+    """
+    Search ALL sources simultaneously within the latency budget.
+    Safe to call from any thread; work is scheduled on the shared engine loop.
+    """
+    future = asyncio.run_coroutine_threadsafe(
+        search_all_sources_async(query, sources, budget, source_budgets), get_loop()
+    )
+    return future.result()
+
+
+# Sources started before classification finishes (the router keeps them in
+# every plan), and the time allowed for the classifier before falling back
+# to local keyword classification.
+SPECULATIVE_SOURCES = list(ALWAYS_ON)
+CLASSIFY_BUDGET = float(os.environ.get("CLASSIFY_BUDGET_SECONDS", "1.5"))
+
+# Yielded once by stream_speculative_async with the routing plan as data.
+PLAN_EVENT = "__plan__"
+
+_speculation_lock = threading.Lock()
+_speculation = {
+    "runs": 0,
+    "arrived_before_plan": 0,
+    "classifier_fallbacks": 0,
+    "classifier_seconds": 0.0,
+}
+
+
+def _record_speculation(**counts) -> None:
+    with _speculation_lock:
+        for key, value in counts.items():
+            _speculation[key] += value
+
+
+def speculation_stats() -> dict:
+    """
+    How long classification takes, and how many speculative results
+    arrived before it finished (each of those is latency saved).
+    """
+    with _speculation_lock:
+        stats = dict(_speculation)
+    runs = stats["runs"]
+    stats["classifier_seconds_avg"] = stats["classifier_seconds"] / runs if runs else 0.0
+    return stats
+
+
+async def _classify(query: str) -> dict:
+    _ensure_executors()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    call = functools.partial(contextvars.copy_context().run, classify_query, query)
+    try:
+        classification = await asyncio.wait_for(
+            loop.run_in_executor(_classifier_executor, call), timeout=CLASSIFY_BUDGET
+        )
+    except Exception:
+        classification = fallback_classify(query)
+        _record_speculation(classifier_fallbacks=1)
+    _record_speculation(classifier_seconds=loop.time() - started)
+    return classification
+
+
+async def stream_speculative_async(query: str, budget: float = None,
+                                   source_budgets: dict = None):
+    """
+    Start SPECULATIVE_SOURCES right away while classify_query runs, then
+    start the other sources the classifier selects. Yields
+    (PLAN_EVENT, plan) once the plan is known and (source, result) pairs
+    in order of arrival.
+
+    Classification is budgeted separately (CLASSIFY_BUDGET): sources
+    started from the plan get the full `budget` from that moment.
+    """
+    budget = SEARCH_BUDGET if budget is None else budget
+    source_budgets = {**SOURCE_BUDGETS, **(source_budgets or {})}
+    loop = asyncio.get_running_loop()
+    end = loop.time() + budget
+    pending = {}
+    arrived = set()
+    neighbors = _similar_queries(query)
+
+    def start(name):
+        source_budget = min(budget, source_budgets.get(name, budget))
+        pending[asyncio.create_task(_safe_search(name, query, source_budget, neighbors))] = name
+
+    for name in SPECULATIVE_SOURCES:
+        start(name)
+    classifier = asyncio.create_task(_classify(query))
+    plan = None
+    try:
+        while pending or plan is None:
+            if plan is None:
+                # The classifier bounds its own wait.
+                waiting, timeout = set(pending) | {classifier}, None
+            else:
+                waiting, timeout = set(pending), end - loop.time()
+                if timeout <= 0:
+                    break
+            done, _ = await asyncio.wait(
+                waiting, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if plan is None and classifier in done:
+                plan = plan_sources(query, classifier.result())
+                _record_speculation(runs=1, arrived_before_plan=len(arrived))
+                end = max(end, loop.time() + budget)
+                for name in plan["selected"]:
+                    if name not in SPECULATIVE_SOURCES:
+                        start(name)
+                yield PLAN_EVENT, plan
+            for task in done:
+                if task in pending:
+                    name = pending.pop(task)
+                    arrived.add(name)
+                    yield name, task.result()
+    finally:
+        classifier.cancel()
+        for task in pending:
+            task.cancel()
+    for name in pending.values():
+        yield name, _timed_out(budget)
+
+
+_STREAM_DONE = object()
+
+
+def _iterate(stream):
+    """
+    Drive an async generator on the engine loop and yield its items here.
+    """
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in stream:
+                items.put(item)
+        finally:
+            items.put(_STREAM_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_loop())
+    while True:
+        item = items.get()
+        if item is _STREAM_DONE:
+            break
+        yield item
+    future.result()
+
+
+def iter_search_results(query: str, sources=None, budget: float = None,
+                        source_budgets: dict = None):
+    """
+    Blocking iterator over (source, result) pairs as each source completes.
+    Lets the UI render fast sources without waiting for the slowest one.
+    """
+    return _iterate(stream_sources_async(query, sources, budget, source_budgets))
+
+
+def iter_speculative_results(query: str, budget: float = None, source_budgets: dict = None):
+    """
+    Blocking iterator over stream_speculative_async, including its PLAN_EVENT.
+    """
+    return _iterate(stream_speculative_async(query, budget, source_budgets))
@@ -0,0 +1,198 @@
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from result_cache import normalize_query
+
+# Paraphrases ("weather paris", "paris weather", "what's the weather in
+# Paris") map to nearly the same hashed bag of words and character
+# trigrams. Recent queries' unit vectors are kept in one matrix, so a
+# single matrix-vector product finds the nearest past queries; each source
+# then reuses a neighbour's cached result only above its own threshold.
+DIM = 1024
+CAPACITY = int(os.environ.get("SEMANTIC_CACHE_SIZE", "2048"))
+NEIGHBORS = 5
+WORD_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.3
+
+DEFAULT_THRESHOLD = 0.9
+# Volatile or place-specific sources need near-identical queries; a
+# source mapped to None never reuses a neighbour's result.
+SOURCE_THRESHOLDS = {
+    "weather": 0.97,
+    "air_quality": 0.97,
+    "geocoding": 0.97,
+    "news": None,
+    "wikipedia": 0.85,
+    "wikidata": 0.85,
+    "dictionary": 0.85,
+    "country": 0.85,
+}
+
+# Function words and time filler that do not change what a query asks
+# for. Deliberately small: words such as "meaning", "define" or "show"
+# can be the whole point of a query ("meaning of life" is not "life").
+STOPWORDS = frozenset("""
+a an the of in on at to for from by with about and or is are was were be been
+do does did what whats who whos which where wheres when how hows why it its
+me my i you your can could would should will tell please
+today now tonight currently right
+""".split())
+# A token starts with a letter or digit and may keep +, #, . and
+# apostrophes inside it, so "c++", "c#", "node.js" and "what's" stay whole.
+_WORD = re.compile(r"[^\W_](?:[\w+#.'\u2019]*[\w+#])?")
+
+
+def _words(query: str) -> list:
+    return [re.sub("['\u2019]", "", w) for w in _WORD.findall(normalize_query(query))]
+
+
+def _content_words(query: str) -> list:
+    words = _words(query)
+    return [w for w in words if w not in STOPWORDS] or words
+
+
+def markers(query: str) -> frozenset:
+    """
+    Single characters and tokens with digits or symbols, which change what
+    a query means ("world war 1" vs "world war 2", "c" vs "c++") but
+    barely move its vector. Neighbours must have exactly the same ones.
+    """
+    return frozenset(
+        w for w in _words(query)
+        if w not in STOPWORDS and (len(w) == 1 or not w.isalpha())
+    )
+
+
+def vectorize(query: str) -> np.ndarray:
+    """
+    Unit-length hashed feature vector of a query's content words and their
+    character trigrams. Word order and stopwords do not matter.
+    """
+    content = _content_words(query)
+    vector = np.zeros(DIM, dtype=np.float32)
+    for word in set(content):
+        vector[zlib.crc32(word.encode("utf-8")) % DIM] += WORD_WEIGHT
+        padded = f"<{word}>"
+        for i in range(len(padded) - 2):
+            vector[zlib.crc32(padded[i:i + 3].encode("utf-8")) % DIM] += TRIGRAM_WEIGHT
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def threshold_for(source: str):
+    return SOURCE_THRESHOLDS.get(source, DEFAULT_THRESHOLD)
+
+
+class SemanticIndex:
+    """
+    Bounded matrix of recent query vectors. When full, the least recently
+    used row is replaced.
+    """
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._vectors = np.zeros((capacity, DIM), dtype=np.float32)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._queries = [None] * capacity
+        self._rows = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.evictions = 0
+
+    def add(self, query: str) -> None:
+        key = normalize_query(query)
+        if not key:
+            return
+        vector = vectorize(key)
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                if self._size < self.capacity:
+                    row = self._size
+                    self._size += 1
+                else:
+                    row = int(np.argmin(self._last_used))
+                    del self._rows[self._queries[row]]
+                    self.evictions += 1
+                self._vectors[row] = vector
+                self._queries[row] = key
+                self._rows[key] = row
+            self._last_used[row] = time.monotonic()
+
+    def neighbors(self, query: str, k: int = NEIGHBORS) -> list:
+        """
+        Up to k past queries most similar to `query`, as [(query, score)],
+        best first, excluding the query itself and queries whose markers
+        differ from its own.
+        """
+        key = normalize_query(query)
+        vector = vectorize(key)
+        own_markers = markers(key)
+        with self._lock:
+            self.lookups += 1
+            if not self._size:
+                return []
+            scores = self._vectors[:self._size] @ vector
+            count = min(k + 1, self._size)
+            top = np.argpartition(-scores, count - 1)[:count]
+            top = top[np.argsort(-scores[top])]
+            found = []
+            for row in top:
+                other = self._queries[row]
+                if other != key and len(found) < k and markers(other) == own_markers:
+                    found.append((other, float(scores[row])))
+                    self._last_used[row] = time.monotonic()
+            return found
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self._size,
+                "capacity": self.capacity,
+                "lookups": self.lookups,
+                "evictions": self.evictions,
+            }
+
+
+_index = SemanticIndex()
+_hits = {}
+_hits_lock = threading.Lock()
+
+
+def remember(query: str) -> None:
+    """
+    Make a searched query available as a neighbour for later queries.
+    """
+    _index.add(query)
+
+
+def neighbors(query: str) -> list:
+    return _index.neighbors(query)
+
+
+def candidates(source: str, neighbor_list: list) -> list:
+    """
+    Neighbouring queries close enough for `source` to reuse their results.
+    """
+    threshold = threshold_for(source)
+    if threshold is None:
+        return []
+    return [query for query, score in neighbor_list if score >= threshold]
+
+
+def record_hit(source: str) -> None:
+    with _hits_lock:
+        _hits[source] = _hits.get(source, 0) + 1
+
+
+def semantic_stats() -> dict:
+    with _hits_lock:
+        hits = dict(_hits)
+    return {**_index.stats(), "hits": hits}
+
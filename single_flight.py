@@ -0,0 +1,77 @@
+import asyncio
+import concurrent.futures
+import threading
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one upstream call.
+    Every caller attached to a flight receives the leader's result, or its
+    exception. Works for threads (do) and for coroutines (do_async).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+        self.flights = 0
+        self.coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Call func(*args, **kwargs) unless a call for `key` is already running
+        in another thread, in which case wait for that call instead.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = concurrent.futures.Future()
+                self._calls[key] = call
+                self.flights += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return call.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def do_async(self, key, coro_func, *args, **kwargs):
+        """
+        Await coro_func(*args, **kwargs) unless an identical flight is already
+        running on this loop. The flight itself is shielded, so a caller that
+        gives up (timeout, cancellation) does not cancel it for the others.
+        """
+        flight_key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            task = self._async_calls.get(flight_key)
+            if task is not None:
+                self.coalesced += 1
+            else:
+                task = asyncio.ensure_future(coro_func(*args, **kwargs))
+                self._async_calls[flight_key] = task
+                self.flights += 1
+                task.add_done_callback(lambda _: self._forget(flight_key))
+        return await asyncio.shield(task)
+
+    def _forget(self, flight_key) -> None:
+        with self._lock:
+            self._async_calls.pop(flight_key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "flights": self.flights,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._async_calls),
+            }
@@ -0,0 +1,122 @@
+import os
+import threading
+from collections import Counter
+
+from ai_service import fallback_classify, KEYWORD_CATEGORIES, KEYWORD_MATCHER
+from country_index import mentions_country
+
+ALL_SOURCES = [
+    "arxiv", "duckduckgo", "duckduckgo_instant", "news", "wikipedia", "weather",
+    "air_quality", "wikidata", "books", "pubmed", "geocoding", "dictionary",
+    "country", "quotes", "github", "stackoverflow",
+]
+
+# Cheap, almost always relevant sources that run for every query.
+ALWAYS_ON = ["duckduckgo_instant", "duckduckgo", "wikipedia"]
+
+# At most TOP_N routed sources run on top of ALWAYS_ON, and only those
+# scoring at least MIN_SCORE.
+TOP_N = int(os.environ.get("ROUTER_TOP_N", "3"))
+MIN_SCORE = float(os.environ.get("ROUTER_MIN_SCORE", "0.5"))
+
+CLASSIFIER_SCORE = 0.6
+KEYWORD_SCORE = 0.5
+
+# Prior relevance of a source with no other signal.
+SOURCE_PRIORS = {
+    "wikidata": 0.3,
+    "news": 0.2,
+}
+
+_stats_lock = threading.Lock()
+_stats = {"plans": 0, "sources_run": 0, "search_everything": 0}
+_skipped = Counter()
+
+
+def score_sources(query: str, classification: dict = None) -> dict:
+    """
+    Score every source's relevance to the query between 0 and 1.
+    """
+    matches = KEYWORD_MATCHER.match(query)
+    if classification is None:
+        classification = fallback_classify(query, matches)
+    words = query.split()
+
+    scores = {name: SOURCE_PRIORS.get(name, 0.0) for name in ALL_SOURCES}
+    for name in classification.get("sources", []):
+        if name in scores:
+            scores[name] = max(scores[name], CLASSIFIER_SCORE)
+    # Each distinct keyword hit adds to every source its category suggests.
+    for category, hits in matches.items():
+        distinct = len({keyword for _, keyword in hits})
+        for name in KEYWORD_CATEGORIES[category]["sources"]:
+            scores[name] = min(1.0, scores[name] + distinct * KEYWORD_SCORE)
+
+    # One or two word queries are often a bare word or a place name.
+    if 0 < len(words) <= 2:
+        scores["dictionary"] = max(scores["dictionary"], 0.5)
+    # With the country index loaded, country relevance is known exactly.
+    mentioned = mentions_country(query)
+    if mentioned:
+        scores["country"] = max(scores["country"], CLASSIFIER_SCORE)
+    elif mentioned is None and 0 < len(words) <= 2:
+        scores["country"] = max(scores["country"], 0.5)
+    if classification.get("location"):
+        for name in ("weather", "geocoding"):
+            scores[name] = max(scores[name], CLASSIFIER_SCORE)
+    return scores
+
+
+def plan_sources(query: str, classification: dict = None, search_everything: bool = False,
+                 always_on=None, top_n: int = None, record: bool = True) -> dict:
+    """
+    Decide which sources to query.
+    Returns {"selected": [...], "skipped": [...], "scores": {...}}.
+    With record=False (background callers) router_stats is left alone.
+    """
+    always_on = ALWAYS_ON if always_on is None else always_on
+    top_n = TOP_N if top_n is None else top_n
+    scores = score_sources(query, classification)
+
+    if search_everything:
+        selected = list(ALL_SOURCES)
+    else:
+        ranked = sorted(
+            (name for name in ALL_SOURCES if name not in always_on),
+            key=lambda name: scores[name],
+            reverse=True,
+        )
+        routed = [name for name in ranked[:top_n] if scores[name] >= MIN_SCORE]
+        chosen = set(always_on) | set(routed)
+        selected = [name for name in ALL_SOURCES if name in chosen]
+    skipped = [name for name in ALL_SOURCES if name not in selected]
+
+    if record:
+        _record_plan(selected, skipped, search_everything)
+    return {
+        "selected": selected,
+        "skipped": skipped,
+        "scores": scores,
+        "search_everything": search_everything,
+    }
+
+
+def _record_plan(selected: list, skipped: list, search_everything: bool) -> None:
+    with _stats_lock:
+        _stats["plans"] += 1
+        _stats["sources_run"] += len(selected)
+        _stats["search_everything"] += int(search_everything)
+        _skipped.update(skipped)
+
+
+def router_stats() -> dict:
+    """
+    Aggregate routing counters: average fan-out and how often each source was skipped.
+    """
+    with _stats_lock:
+        plans = _stats["plans"]
+        return {
+            **_stats,
+            "average_fanout": _stats["sources_run"] / plans if plans else 0.0,
+            "skipped": dict(_skipped),
+        }
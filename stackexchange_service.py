@@ -1,4 +1,57 @@
-import requests
+import time
+
+from http_session import http_get
+from quota_scheduler import conditional_get, get_quota, QuotaExhausted
+
+# A filter with just the fields search_stackoverflow renders, plus the
+# quota wrapper fields. It is created once per process through the API;
+# DEFAULT_FILTER is used until then or if creation fails.
+FILTER_FIELDS = [
+    ".items", ".quota_remaining", ".quota_max", ".backoff",
+    "question.title", "question.score", "question.answer_count", "question.is_answered",
+    "question.tags", "question.link", "question.view_count",
+]
+DEFAULT_FILTER = "!nNPvSNVZJS"
+FILTER_RETRY_SECONDS = 600
+
+DAY = 24 * 3600
+
+_search_quota = get_quota("stackexchange")
+_search_filter = None
+_filter_attempted = 0.0
+
+
+def _get_search_filter() -> str:
+    global _search_filter, _filter_attempted
+    if _search_filter is not None:
+        return _search_filter
+    if _filter_attempted and time.monotonic() - _filter_attempted < FILTER_RETRY_SECONDS:
+        return DEFAULT_FILTER
+    _filter_attempted = time.monotonic()
+    try:
+        params = {
+            "include": ";".join(FILTER_FIELDS),
+            "base": "none",
+            "unsafe": "false"
+        }
+        response = http_get("https://api.stackexchange.com/2.3/filters/create", params=params, timeout=5)
+        response.raise_for_status()
+        _search_filter = response.json()["items"][0]["filter"]
+        return _search_filter
+    except Exception:
+        return DEFAULT_FILTER
+
+
+def _update_quota(data: dict) -> None:
+    # The daily quota resets at midnight UTC; `backoff` asks us to stop
+    # calling this method for that many seconds. Only a fresh body has
+    # current values; a revalidated one would re-arm an old backoff.
+    _search_quota.update(
+        remaining=data.get("quota_remaining"),
+        limit=data.get("quota_max"),
+        reset_at=(time.time() // DAY + 1) * DAY,
+        backoff=data.get("backoff")
+    )
 
 
 def search_stackoverflow(query: str, limit: int = 5) -> list:
@@ -14,13 +67,12 @@ def search_stackoverflow(query: str, limit: int = 5) -> list:
             "sort": "relevance",
             "site": "stackoverflow",
             "pagesize": limit,
-            "filter": "!nNPvSNVZJS"
+            "filter": _get_search_filter()
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = conditional_get(
+            _search_quota, url, params=params, timeout=10, on_fresh=_update_quota
+        )
         items = data.get("items", [])
         
         if not items:
@@ -39,5 +91,7 @@ def search_stackoverflow(query: str, limit: int = 5) -> list:
             })
         
         return questions
+    except QuotaExhausted as e:
+        return [{"error": f"Stack Overflow search skipped: {str(e)}", "rate_limited": True}]
     except Exception as e:
         return [{"error": f"Stack Overflow search failed: {str(e)}"}]
@@ -0,0 +1,34 @@
+import pytest
+
+from semantic_cache import DEFAULT_THRESHOLD, SemanticIndex
+
+
+def _shares(first: str, second: str) -> bool:
+    index = SemanticIndex(capacity=4)
+    index.add(first)
+    found = dict(index.neighbors(second))
+    return found.get(first, 0.0) >= DEFAULT_THRESHOLD
+
+
+@pytest.mark.parametrize("first, second", [
+    ("world war 1", "world war 2"),
+    ("vitamin b", "vitamin c"),
+    ("hepatitis a", "hepatitis b"),
+    ("type 1 diabetes", "type 2 diabetes"),
+    ("c++", "c#"),
+    ("c", "c++"),
+    ("life", "meaning of life"),
+])
+def test_distinct_queries_do_not_share(first, second):
+    assert not _shares(first, second)
+    assert not _shares(second, first)
+
+
+@pytest.mark.parametrize("first, second", [
+    ("weather paris", "what's the weather in Paris today?"),
+    ("paris weather", "weather paris"),
+    ("python", "what is python"),
+    ("c++ templates", "templates in C++"),
+])
+def test_paraphrases_share(first, second):
+    assert _shares(first, second)
@@ -1,4 +1,4 @@
-import requests
+from http_session import http_get
 
 
 def get_weather_wttr(location: str) -> dict:
@@ -6,8 +6,9 @@ def get_weather_wttr(location: str) -> dict:
     Get weather from wttr.in (free, no API key).
     """
     try:
-        url = f"https://wttr.in/{location}?format=j1"
-        response = requests.get(url, timeout=10)
+        # j2 is j1 without the hourly forecast, which is never read here.
+        url = f"https://wttr.in/{location}?format=j2"
+        response = http_get(url, timeout=10)
         response.raise_for_status()
         
         data = response.json()
@@ -40,7 +41,7 @@ def get_weather_open_meteo(latitude: float, longitude: float) -> dict:
             "current": ["temperature_2m", "relative_humidity_2m", "weather_code", "wind_speed_10m"],
             "timezone": "auto"
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = http_get(url, params=params, timeout=10)
         response.raise_for_status()
         
         data = response.json()
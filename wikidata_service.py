@@ -1,9 +1,11 @@
-import requests
+from http_session import http_get
+from wikimedia_client import get_entity, get_entities
 
 
 def search_wikidata(query: str, limit: int = 5) -> list:
     """
-    Search Wikidata for structured knowledge.
+    Search Wikidata for structured knowledge. Hits are resolved through the
+    batched entity client.
     """
     try:
         url = "https://www.wikidata.org/w/api.php"
@@ -15,17 +17,26 @@ def search_wikidata(query: str, limit: int = 5) -> list:
             "format": "json"
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = http_get(url, params=params, timeout=10)
         response.raise_for_status()
         
-        data = response.json()
+        hits = response.json().get("search", [])
+        # Resolve every hit's English label and description in one bulk
+        # wbgetentities call; search snippets are kept if that fails.
+        try:
+            entities = get_entities([item.get("id", "") for item in hits])
+        except Exception:
+            entities = {}
         results = []
         
-        for item in data.get("search", []):
+        for item in hits:
+            entity = entities.get(item.get("id", ""), {})
+            label = entity.get("labels", {}).get("en", {}).get("value")
+            description = entity.get("descriptions", {}).get("en", {}).get("value")
             results.append({
                 "id": item.get("id", ""),
-                "label": item.get("label", ""),
-                "description": item.get("description", ""),
+                "label": label or item.get("label", ""),
+                "description": description or item.get("description", ""),
                 "url": item.get("concepturi", "")
             })
         
@@ -37,21 +48,10 @@ def search_wikidata(query: str, limit: int = 5) -> list:
 def get_wikidata_entity(entity_id: str) -> dict:
     """
     Get detailed information about a Wikidata entity.
+    Concurrent lookups are merged into bulk wbgetentities calls.
     """
     try:
-        url = "https://www.wikidata.org/w/api.php"
-        params = {
-            "action": "wbgetentities",
-            "ids": entity_id,
-            "languages": "en",
-            "format": "json"
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        entity = data.get("entities", {}).get(entity_id, {})
+        entity = get_entity(entity_id) or {}
         
         labels = entity.get("labels", {}).get("en", {})
         descriptions = entity.get("descriptions", {}).get("en", {})
@@ -0,0 +1,126 @@
+import functools
+
+from http_session import http_get
+from request_batcher import get_batcher, wait
+
+# Batched access to the Wikipedia and Wikidata action APIs. Summaries for
+# up to EXTRACTS_BATCH titles come back from one prop=extracts|info query
+# and up to ENTITIES_BATCH Wikidata ids from one wbgetentities call;
+# lookups from concurrent sessions are merged by request_batcher. Both
+# hosts go through the shared keep-alive session in http_session.
+EXTRACTS_BATCH = 20
+ENTITIES_BATCH = 50
+WIKIDATA_API = "https://www.wikidata.org/w/api.php"
+
+
+def _wikipedia_api(lang: str) -> str:
+    return f"https://{lang}.wikipedia.org/w/api.php"
+
+
+def fetch_extracts(lang: str, titles: list) -> dict:
+    """
+    Intro extracts and URLs for many titles in one request, following
+    normalization and redirects. Maps each requested title to its page,
+    or to None if the page does not exist.
+    """
+    params = {
+        "action": "query",
+        "prop": "extracts|info",
+        "exintro": 1,
+        "explaintext": 1,
+        "exlimit": "max",
+        "inprop": "url",
+        "redirects": 1,
+        "titles": "|".join(titles),
+        "format": "json",
+        "formatversion": 2
+    }
+    response = http_get(_wikipedia_api(lang), params=params, timeout=10)
+    response.raise_for_status()
+    data = response.json().get("query", {})
+
+    renamed = {}
+    for step in ("normalized", "redirects"):
+        for item in data.get(step, []):
+            renamed[item["from"]] = item["to"]
+    pages = {
+        page["title"]: page
+        for page in data.get("pages", [])
+        if not page.get("missing") and not page.get("invalid")
+    }
+
+    results = {}
+    for title in titles:
+        resolved = title
+        # A title can be normalized and then redirected.
+        for _ in range(3):
+            if resolved not in renamed:
+                break
+            resolved = renamed[resolved]
+        results[title] = pages.get(resolved)
+    return results
+
+
+def fetch_entities(ids: list, language: str = "en") -> dict:
+    """
+    Labels and descriptions for many Wikidata ids in one wbgetentities call.
+    """
+    params = {
+        "action": "wbgetentities",
+        "ids": "|".join(ids),
+        "props": "labels|descriptions",
+        "languages": language,
+        "format": "json"
+    }
+    response = http_get(WIKIDATA_API, params=params, timeout=10)
+    response.raise_for_status()
+    entities = response.json().get("entities", {})
+    return {
+        entity_id: entities[entity_id]
+        for entity_id in ids
+        if entity_id in entities and "missing" not in entities[entity_id]
+    }
+
+
+def get_extract(title: str, lang: str = "en"):
+    """
+    Page dict (title, extract, fullurl, ...) for one title, or None if it
+    does not exist. Concurrent callers share batched requests.
+    """
+    # "|" separates titles in the shared request and is never part of one.
+    if "|" in title or not title.strip():
+        return None
+    batcher = get_batcher(
+        f"wikipedia_extracts_{lang}",
+        functools.partial(fetch_extracts, lang),
+        max_batch=EXTRACTS_BATCH,
+    )
+    return batcher.get(title)
+
+
+def get_entity(entity_id: str):
+    """
+    Raw wbgetentities record for one id, or None if it does not exist.
+    """
+    if "|" in entity_id or not entity_id.strip():
+        return None
+    return _entity_batcher().get(entity_id)
+
+
+def get_entities(entity_ids: list) -> dict:
+    """
+    Raw wbgetentities records for several ids, sent in one batch together
+    with other sessions' lookups. Ids that do not exist are left out.
+    """
+    ids = [i for i in dict.fromkeys(entity_ids) if i and "|" not in i]
+    futures = _entity_batcher().submit_many(ids)
+    entities = {}
+    for entity_id, future in zip(ids, futures):
+        entity = wait(future)
+        if entity is not None:
+            entities[entity_id] = entity
+    return entities
+
+
+def _entity_batcher():
+    return get_batcher("wikidata_entities", fetch_entities, max_batch=ENTITIES_BATCH)
@@ -1,31 +1,70 @@
+import os
+
+import requests
 import wikipediaapi
 
+from client_pool import get_pool, parse_sizes
+from wikimedia_client import get_extract
+
+
+def _new_client(lang: str) -> wikipediaapi.Wikipedia:
+    return wikipediaapi.Wikipedia(
+        user_agent="MultiSearchChatbot/1.0 (contact@example.com)",
+        language=lang
+    )
+
+
+# One pool of clients per language; WIKIPEDIA_POOL_SIZES sets how many idle
+# clients each language keeps, e.g. "en=8,de=2,*=2".
+_wiki_pool = get_pool(
+    "wikipedia",
+    _new_client,
+    max_idle={None: 4, **parse_sizes(os.environ.get("WIKIPEDIA_POOL_SIZES", ""))}
+)
+
+
+def _page_result(title: str, summary: str, url: str) -> dict:
+    summary = summary[:1000] + "..." if len(summary) > 1000 else summary
+    return {
+        "title": title,
+        "summary": summary,
+        "url": url,
+        "exists": True
+    }
+
 
 def search_wikipedia(query: str, lang: str = "en") -> dict:
     """
     Search Wikipedia for information.
-    Returns article summary and URL.
+    Returns article summary and URL. Pages come from the batched Wikimedia
+    client; the pooled wikipediaapi clients are only used if the API
+    answers with an error. A missed deadline or rate limit is final.
     """
     try:
-        wiki = wikipediaapi.Wikipedia(
-            user_agent="MultiSearchChatbot/1.0 (contact@example.com)",
-            language=lang
-        )
-        
-        page = wiki.page(query)
+        page = get_extract(query, lang)
+    except (requests.HTTPError, ValueError, KeyError):
+        return _search_wikipediaapi(query, lang)
+    except Exception as e:
+        return {"error": f"Wikipedia search failed: {str(e)}"}
+    if page is None:
+        return {
+            "exists": False,
+            "message": f"No Wikipedia article found for '{query}'"
+        }
+    return _page_result(page.get("title", query), page.get("extract", ""), page.get("fullurl", ""))
+
+
+def _search_wikipediaapi(query: str, lang: str) -> dict:
+    try:
+        with _wiki_pool.client(lang) as wiki:
+            page = wiki.page(query)
         
-        if page.exists():
-            summary = page.summary[:1000] + "..." if len(page.summary) > 1000 else page.summary
-            return {
-                "title": page.title,
-                "summary": summary,
-                "url": page.fullurl,
-                "exists": True
-            }
-        else:
-            return {
-                "exists": False,
-                "message": f"No Wikipedia article found for '{query}'"
-            }
+            if page.exists():
+                return _page_result(page.title, page.summary, page.fullurl)
+            else:
+                return {
+                    "exists": False,
+                    "message": f"No Wikipedia article found for '{query}'"
+                }
     except Exception as e:
         return {"error": f"Wikipedia search failed: {str(e)}"}